@@ -5,6 +5,7 @@ import os
 from datetime import datetime
 import tempfile
 import numpy as np
+from collections import deque
 
 # Configuration
 API_BASE_URL = "http://localhost:8000"
@@ -13,6 +14,19 @@ WAIT_DURATION = 3  # seconds between captures
 VIDEO_FPS = 30
 VIDEO_WIDTH = 640
 VIDEO_HEIGHT = 480
+SOURCE_ID = os.environ.get("SOURCE_ID", "webcam")  # lets the server compare clips from the same camera
+
+# "segment" records one clip per burst of activity, "fixed" records CLIP_DURATION clips every WAIT_DURATION
+CAPTURE_MODE = os.environ.get("CAPTURE_MODE", "segment")
+START_THRESHOLD = 0.02  # fraction of changed pixels that opens a clip
+STOP_THRESHOLD = 0.01  # activity below this counts as quiet
+START_FRAMES = 2  # consecutive active frames needed to open a clip
+QUIET_DURATION = 1.0  # seconds of quiet that close a clip
+MIN_CLIP_DURATION = 1.0  # seconds
+MAX_CLIP_DURATION = 10.0  # seconds
+PRE_ROLL_DURATION = 1.0  # seconds recorded before the activity started
+MOTION_SIZE = (160, 120)
+PIXEL_THRESHOLD = 25
 
 # Global variables for display
 current_status = "Initializing..."
@@ -86,6 +100,73 @@ def capture_video_clip_with_display(cap):
     
     return temp_file.name
 
+def capture_segment_with_display(cap):
+    """Wait for activity and record it as one clip, from PRE_ROLL_DURATION before it started until it subsides.
+
+    Returns (path of the clip or None if nothing was recorded, whether 'q' was pressed).
+    """
+    global current_status, recording
+    
+    pre_roll = deque(maxlen=max(1, int(PRE_ROLL_DURATION * VIDEO_FPS)))
+    previous = None
+    active_frames = 0
+    out = None
+    temp_file = None
+    start_time = last_active = None
+    quit_requested = False
+    current_status = "Watching..."
+    
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            current_status = "Error: Could not read frame from webcam"
+            break
+        
+        # Activity is the fraction of pixels that changed since the previous frame
+        gray = cv2.resize(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), MOTION_SIZE, interpolation=cv2.INTER_AREA)
+        activity = 0.0 if previous is None else float((cv2.absdiff(gray, previous) > PIXEL_THRESHOLD).mean())
+        previous = gray
+        now = time.time()
+        
+        if out is None:
+            pre_roll.append(frame)
+            active_frames = active_frames + 1 if activity >= START_THRESHOLD else 0
+            if active_frames >= START_FRAMES:
+                temp_file = tempfile.NamedTemporaryFile(suffix='.mp4', delete=False)
+                temp_file.close()
+                fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+                out = cv2.VideoWriter(temp_file.name, fourcc, VIDEO_FPS, (VIDEO_WIDTH, VIDEO_HEIGHT))
+                for buffered in pre_roll:
+                    out.write(buffered)
+                start_time = now - len(pre_roll) / VIDEO_FPS
+                last_active = now
+                current_status = "Recording..."
+                recording = True
+        else:
+            out.write(frame)
+            if activity >= STOP_THRESHOLD:
+                last_active = now
+            duration = now - start_time
+            if duration >= MAX_CLIP_DURATION or (now - last_active >= QUIET_DURATION and duration >= MIN_CLIP_DURATION):
+                break
+        
+        # Display frame with overlay
+        display_frame = draw_overlay(frame, current_status, last_analysis)
+        cv2.imshow('Bully Detection System', display_frame)
+        
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            quit_requested = True
+            break
+    
+    recording = False
+    if out is None:
+        return None, quit_requested
+    
+    current_status = "Processing..."
+    out.release()
+    print(f"Recorded {now - start_time:.1f}-second clip")
+    return temp_file.name, quit_requested
+
 def send_video_to_server(video_path):
     """Send video to FastAPI server for processing"""
     global current_status, last_analysis
@@ -98,7 +179,7 @@ def send_video_to_server(video_path):
             
             current_status = "Analyzing..."
             # Add timeout to prevent hanging
-            response = requests.post(url, files=files, timeout=30)
+            response = requests.post(url, files=files, data={'source': SOURCE_ID}, timeout=30)
             
             if response.status_code == 200:
                 result = response.json()
@@ -162,7 +243,10 @@ def main():
     
     print("Starting webcam monitoring system...")
     print("Press 'q' during recording to quit")
-    print(f"Capturing {CLIP_DURATION}-second clips every {WAIT_DURATION} seconds")
+    if CAPTURE_MODE == "segment":
+        print(f"Capturing one clip per burst of activity ({MIN_CLIP_DURATION}-{MAX_CLIP_DURATION} seconds)")
+    else:
+        print(f"Capturing {CLIP_DURATION}-second clips every {WAIT_DURATION} seconds")
     print(f"Server URL: {API_BASE_URL}")
     print("-" * 50)
     
@@ -220,7 +304,15 @@ def main():
             print(f"\n[{timestamp}] Clip #{clip_count}")
             
             # Capture video clip
-            video_path = capture_video_clip_with_display(cap)
+            quit_requested = False
+            if CAPTURE_MODE == "segment":
+                video_path, quit_requested = capture_segment_with_display(cap)
+                if video_path is None:
+                    # 'q' was pressed, or the webcam stopped delivering frames
+                    print("Quit requested by user" if quit_requested else current_status)
+                    break
+            else:
+                video_path = capture_video_clip_with_display(cap)
             
             if video_path:
                 # Send to server for processing
@@ -236,6 +328,15 @@ def main():
             else:
                 print("Failed to capture video clip")
             
+            if quit_requested:
+                # The clip recorded so far has been sent, now stop
+                print("Quit requested by user")
+                break
+            
+            if CAPTURE_MODE == "segment":
+                # Watching for the next burst of activity starts right away
+                continue
+            
             # Display waiting status
             current_status = "Waiting..."
             print(f"Waiting {WAIT_DURATION} seconds before next capture...")
@@ -29,8 +29,34 @@ function App() {
 
   // WebSocket connection for real-time notifications
   useEffect(() => {
+    // Last event seen, so a reconnect only replays what was missed
+    let lastSeq = null;
+    let epoch = null;
+
+    const resyncReports = async () => {
+      try {
+        const response = await fetch('http://localhost:8000/reports?limit=5&fields=summary');
+        const result = await response.json();
+        setReportNotifications(result.reports.map(report => ({
+          id: report.report_id,
+          reportId: report.report_id,
+          filename: report.filename,
+          videoFilename: report.filename,
+          violenceDetected: report.violence_detected,
+          classification: report.classification,
+          timestamp: new Date(report.analysis_timestamp_utc).toLocaleTimeString(),
+          message: report.violence_detected
+            ? `INCIDENT REPORT: ${report.classification}`
+            : `ANALYSIS COMPLETE: ${report.filename}`
+        })));
+      } catch (error) {
+        console.error('Error resyncing reports:', error);
+      }
+    };
+
     const connectWebSocket = () => {
-      const ws = new WebSocket('ws://localhost:8000/ws');
+      const resume = lastSeq !== null ? `?since=${lastSeq}&epoch=${epoch}` : '';
+      const ws = new WebSocket(`ws://localhost:8000/ws${resume}`);
       
       ws.onopen = () => {
         console.log('WebSocket connected');
@@ -43,8 +69,41 @@ function App() {
           const data = JSON.parse(event.data);
           console.log('Parsed WebSocket data:', data);
           
-          if (data.type === 'connection_established') {
+          if (data.seq !== undefined && data.type !== 'resync_required') {
+            if (data.type === 'connection_established') {
+              // A fresh connection starts from the server's current position
+              if (lastSeq === null || data.epoch !== epoch) {
+                lastSeq = data.seq;
+              }
+            } else {
+              lastSeq = data.seq;
+            }
+            epoch = data.epoch;
+          }
+          
+          if (data.type === 'ping') {
+            // Heartbeat, the server closes connections that stop answering
+            ws.send(JSON.stringify({ type: 'pong', timestamp: data.timestamp }));
+          } else if (data.type === 'connection_established') {
             console.log('WebSocket connection established:', data.message);
+          } else if (data.type === 'monitor_result') {
+            if (data.source_id === 'default') {
+              if (data.error) {
+                setAnalysisStatus(`Error: ${data.error}`);
+              } else {
+                setLastAnalysisResult(data);
+                setClipCount(prev => prev + 1);
+                setAnalysisStatus('Monitoring');
+              }
+            }
+          } else if (data.type === 'monitor_status' || data.type === 'job_completed') {
+            // Status updates, nothing to show
+          } else if (data.type === 'resync_required') {
+            // Missed events are gone, start over from the server's current state
+            console.log('WebSocket resync required:', data.reason);
+            lastSeq = data.seq;
+            epoch = data.epoch;
+            resyncReports();
           } else if (data.type === 'new_violent_video') {
             // Print function triggered when new video is saved to stored_videos
             console.log('NEW VIOLENT VIDEO DETECTED!');
@@ -130,6 +189,15 @@ function App() {
             };
             
             setReportNotifications(prev => [reportNotification, ...prev.slice(0, 4)]);
+          } else if (data.type === 'incident_updated') {
+            // Another clip joined an incident, its report is updated rather than a new one added
+            setReportNotifications(prev => prev.map(report => report.reportId === data.report_id
+              ? {
+                  ...report,
+                  classification: data.classification,
+                  message: `INCIDENT REPORT: ${data.classification} (${data.clip_count} clips)`
+                }
+              : report));
           } else {
             console.log('Unknown WebSocket message type:', data.type);
           }
@@ -160,72 +228,29 @@ function App() {
     };
   }, []);
 
-  // Video capture and analysis functionality
-  const captureVideoClip = async () => {
-    if (!cameraStatus.active || !isMonitoring) {
-      console.log('Camera not active or monitoring disabled');
-      return;
-    }
-
-    try {
-      setIsRecording(true);
-      setAnalysisStatus('Recording...');
-      
-      // Use the server endpoint to capture and analyze video directly from the camera
-      const response = await fetch('http://localhost:8000/capture_and_analyze', {
-        method: 'POST'
-      });
-      
-      if (response.ok) {
-        const result = await response.json();
-        setLastAnalysisResult(result);
-        setAnalysisStatus('Ready');
-        
-        console.log('Analysis complete:', result);
-        console.log(`Violence detected: ${result.violence_detected}`);
-        console.log(`Frames recorded: ${result.frames_recorded}`);
-        
-        if (result.violence_detected) {
-          console.log(`Classification: ${result.classification}`);
-          console.log(`Report: ${result.report?.detailed_report}`);
-        }
-      } else {
-        const errorData = await response.json().catch(() => ({ detail: 'Unknown error' }));
-        console.error('Analysis failed:', errorData.detail);
-        setAnalysisStatus(`Error: ${errorData.detail}`);
-      }
-      
-    } catch (error) {
-      console.error('Error capturing video:', error);
-      setAnalysisStatus('Error: Network issue');
-    } finally {
-      setIsRecording(false);
-    }
-  };
-
-  // Automatic video capture loop (similar to capture.py)
+  // Continuous analysis runs on the server (one clip per burst of activity in the camera feed),
+  // results arrive as monitor_result WebSocket events
   useEffect(() => {
-    let captureInterval;
-    
     if (isMonitoring && cameraStatus.active) {
-      console.log('Starting automatic video capture every 6 seconds (3s recording + 3s wait)');
+      console.log('Starting server-side monitoring of the camera');
       setAnalysisStatus('Waiting...');
+      setIsRecording(true);
       
-      // Initial capture after 1 second
-      const initialTimeout = setTimeout(() => {
-        captureVideoClip();
-        setClipCount(prev => prev + 1);
-      }, 1000);
-      
-      // Then capture every 6 seconds (3s recording + 3s processing/waiting)
-      captureInterval = setInterval(() => {
-        captureVideoClip();
-        setClipCount(prev => prev + 1);
-      }, 6000);
+      fetch('http://localhost:8000/sources/default/monitor/start', { method: 'POST' })
+        .then(async response => {
+          if (!response.ok) {
+            const errorData = await response.json().catch(() => ({ detail: 'Unknown error' }));
+            console.error('Could not start monitoring:', errorData.detail);
+            setAnalysisStatus(`Error: ${errorData.detail}`);
+          }
+        })
+        .catch(error => {
+          console.error('Error starting monitoring:', error);
+          setAnalysisStatus('Error: Network issue');
+        });
       
       return () => {
-        clearTimeout(initialTimeout);
-        clearInterval(captureInterval);
+        fetch('http://localhost:8000/sources/default/monitor/stop', { method: 'POST' }).catch(() => {});
       };
     } else {
       setAnalysisStatus('Monitoring stopped');
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class AnalysisCache:
+    """Content-addressed cache for model responses.
+
+    Keys are a hash of the model, prompt, output schema and the exact frame bytes sent, so
+    the same clip (or the same sampled frames) never pays for the same call twice.
+    A bounded in-memory LRU sits in front of a JSON-file store on disk; both honour the TTL and
+    the disk store is pruned to the same `max_entries`, least recently used files first.
+    """
+
+    def __init__(self, directory="analysis_cache", max_entries=256, ttl=7 * 24 * 3600):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (created_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.disk_evictions = 0
+
+        if self.directory and not os.path.exists(self.directory):
+            os.makedirs(self.directory)
+        self._prune_disk()
+
+    @staticmethod
+    def make_key(model, prompt, frames, schema=None):
+        """Hash the request inputs. `frames` is a list of base64 strings or raw bytes"""
+        digest = hashlib.sha256()
+        digest.update(model.encode("utf-8"))
+        digest.update(b"\0")
+        digest.update(prompt.encode("utf-8"))
+        digest.update(b"\0")
+        if schema is not None:
+            digest.update(json.dumps(schema, sort_keys=True).encode("utf-8"))
+        for frame in frames:
+            digest.update(b"\0")
+            digest.update(frame if isinstance(frame, bytes) else frame.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _expired(self, created_at):
+        return self.ttl is not None and time.time() - created_at > self.ttl
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        """Return the cached value for `key`, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                created_at, value = entry
+                if not self._expired(created_at):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+
+        value = self._load(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, value[0], value[1])
+            return value[1]
+
+    def put(self, key, value):
+        created_at = time.time()
+        with self._lock:
+            self._remember(key, created_at, value)
+        self._store(key, created_at, value)
+
+    def _remember(self, key, created_at, value):
+        self._entries[key] = (created_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _load(self, key):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                record = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if self._expired(record.get("created_at", 0)):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        try:
+            # The modification time is the file's last use, pruning goes by it
+            os.utime(path)
+        except OSError:
+            pass
+        return record["created_at"], record["value"]
+
+    def _store(self, key, created_at, value):
+        if not self.directory:
+            return
+        path = self._path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "w") as f:
+                json.dump({"created_at": created_at, "value": value}, f)
+            os.replace(temp_path, path)
+        except Exception as e:
+            print(f"Error writing analysis cache entry {key}: {str(e)}")
+        self._prune_disk()
+
+    def _prune_disk(self):
+        """Delete expired files and the least recently used ones beyond max_entries"""
+        if not self.directory:
+            return
+        files = []
+        try:
+            with os.scandir(self.directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".json"):
+                        try:
+                            files.append((entry.stat().st_mtime, entry.path))
+                        except OSError:
+                            pass
+        except OSError:
+            return
+        files.sort()
+        now = time.time()
+        excess = len(files) - self.max_entries
+        for i, (mtime, path) in enumerate(files):
+            # mtime is at least the creation time, so an old mtime can only mean an older entry
+            if i < excess or (self.ttl is not None and now - mtime > self.ttl):
+                try:
+                    os.remove(path)
+                    with self._lock:
+                        self.disk_evictions += 1
+                except OSError:
+                    pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "disk_evictions": self.disk_evictions,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0
+            }
@@ -1,20 +1,32 @@
 import uvicorn
-from fastapi import FastAPI, File, UploadFile, HTTPException, WebSocket, WebSocketDisconnect
-from fastapi.responses import JSONResponse, StreamingResponse, FileResponse
+from fastapi import FastAPI, Request, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, StreamingResponse, FileResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 import time
 import os
-import shutil
 import json
+import gzip
+import base64
+import hashlib
 import asyncio
-import cv2
-import threading
-import queue
-from datetime import datetime
-from video_inference import analyze_video, generate_report
+from datetime import datetime, timezone
+from video_inference import AnalysisPipeline, analysis_cache, dedupe_index, fight_detector, client as llm_client
 from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
-from typing import List
+from watchdog.events import FileSystemEventHandler, FileCreatedEvent
+from typing import Optional
+from jobs import JobQueue, QueueFullError
+from ingest import StreamingIngest, IngestError, place_file, safe_filename
+from report_store import ReportStore
+from video_index import VideoIndex, VideoIndexHandler, SORT_KEYS
+from connections import ConnectionManager
+from event_bus import EventBus, Event, EventLog, OwnWrites, NEW_VIOLENT_VIDEO, NEW_REPORT, JOB_COMPLETED, \
+    MONITOR_RESULT, MONITOR_STATUS, INCIDENT_UPDATED
+from incidents import IncidentStore
+from monitor import MonitorManager, MODES as MONITOR_MODES
+from frame_broadcast import MJPEG_BOUNDARY, DEFAULT_QUALITY, mjpeg_part
+from frame_ring import estimate_fps, write_clip
+from camera_registry import CameraRegistry
+from sources import SourceManager, DEFAULT_SOURCE_ID, parse_sources_config
 
 app = FastAPI(title="Social Sentinel Analysis API")
 
@@ -29,163 +41,184 @@ app.add_middleware(
 
 REPORTS_DIR = "debug_videos/reports"
 
-# WebSocket connection manager
-class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+# WebSocket connection manager, every connection has its own bounded send queue and writer task
+manager = ConnectionManager(
+    max_queue=int(os.environ.get("WS_MAX_QUEUE", "100")),
+    send_timeout=float(os.environ.get("WS_SEND_TIMEOUT", "5")),
+    ping_interval=float(os.environ.get("WS_PING_INTERVAL", "20")),
+    ping_timeout=float(os.environ.get("WS_PING_TIMEOUT", "60"))
+)
 
-    async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
+# Analysis jobs run on a bounded worker pool so a slow model call never stalls the event loop
+job_queue = JobQueue(
+    workers=int(os.environ.get("JOB_WORKERS", "4")),
+    max_queue=int(os.environ.get("JOB_QUEUE_SIZE", "100"))
+)
 
-    def disconnect(self, websocket: WebSocket):
-        self.active_connections.remove(websocket)
+# Server events (new clips, reports, finished jobs) go through an in-process bus to the WebSocket clients
+event_bus = EventBus(
+    debounce=float(os.environ.get("EVENT_DEBOUNCE", "0.1")),
+    max_delay=float(os.environ.get("EVENT_MAX_DELAY", "1.0"))
+)
 
-    async def send_personal_message(self, message: str, websocket: WebSocket):
-        await websocket.send_text(message)
+# Files the server writes itself, the file watchers skip them
+own_writes = OwnWrites()
 
-    async def broadcast(self, message: str):
-        for connection in self.active_connections:
-            try:
-                await connection.send_text(message)
-            except:
-                # Remove stale connections
-                self.active_connections.remove(connection)
+# Every event sent to clients is numbered and kept, reconnecting clients replay what they missed
+event_log = EventLog(capacity=int(os.environ.get("WS_EVENT_LOG_SIZE", "1000")))
+
+async def broadcast_event(event):
+    await manager.broadcast(
+        json.dumps(event_log.append(event.to_message())),
+        coalesce_key=event.key,
+        droppable=not event.alert
+    )
+
+event_bus.subscribe(broadcast_event)
 
-manager = ConnectionManager()
+async def publish_job_completed(job):
+    """Tell the dashboards that an analysis job finished"""
+    result = job.get("result") or {}
+    event_bus.publish(Event(JOB_COMPLETED, {
+        "job_id": job["job_id"],
+        "kind": job["kind"],
+        "status": job["status"],
+        "filename": job.get("filename"),
+        "violence_detected": result.get("violence_detected"),
+        "classification": result.get("classification"),
+        "error": job["error"]
+    }))
 
-# Camera streaming setup
-camera_frame_queue = queue.Queue(maxsize=10)
-camera_active = False
-camera_thread = None
+job_queue.on_complete.append(publish_job_completed)
+
+# Cameras are probed in the background, lookups are answered from memory
+# CAMERA_SOURCES is a comma separated list of device indices or video files (fake cameras for testing)
+camera_registry = CameraRegistry(
+    sources=os.environ["CAMERA_SOURCES"].split(",") if os.environ.get("CAMERA_SOURCES") else None,
+    probe_interval=float(os.environ.get("CAMERA_PROBE_INTERVAL", "60"))
+)
 
 def find_working_camera():
-    """Try to find a working camera by testing different indices"""
-    for i in range(5):  # Try camera indices 0-4
-        cap = cv2.VideoCapture(i)
-        if cap.isOpened():
-            ret, frame = cap.read()
-            if ret:
-                cap.release()
-                return i
-            cap.release()
-    return None
+    """Return the first camera the registry last found working"""
+    return camera_registry.first_working()
 
-def camera_capture_thread():
-    """Background thread to capture frames from camera"""
-    global camera_active
-    
-    camera_index = find_working_camera()
-    if camera_index is None:
-        print("No working camera found for streaming")
-        return
-    
-    cap = cv2.VideoCapture(camera_index)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-    cap.set(cv2.CAP_PROP_FPS, 30)
-    
-    print(f"Started camera streaming thread with camera index {camera_index}")
-    
-    while camera_active:
-        ret, frame = cap.read()
-        if not ret:
-            continue
-            
-        # Encode frame as JPEG
-        _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 85])
-        frame_bytes = buffer.tobytes()
-        
-        # Put frame in queue (non-blocking)
-        try:
-            camera_frame_queue.put_nowait(frame_bytes)
-        except queue.Full:
-            # Remove oldest frame and add new one
-            try:
-                camera_frame_queue.get_nowait()
-                camera_frame_queue.put_nowait(frame_bytes)
-            except queue.Empty:
-                pass
-    
-    cap.release()
-    print("Camera streaming thread stopped")
+# One capture worker per source, each with its own ring buffer (captures are cut from there)
+# and its own broadcaster (frames are encoded once and shared by every viewer).
+# Captured clips are cut from the ring, so its resolution is the resolution of the stored
+# evidence and of the frames the model sees. By default it matches the payload limit
+# (PAYLOAD_MAX_DIMENSION) so buffering costs the analysis nothing; at 6 s of 30 fps that is
+# about 100 MB per 640x480 source. 0 keeps native resolution, lower values trade clip
+# quality for memory when many sources are configured.
+source_manager = SourceManager(
+    registry=camera_registry,
+    buffer_seconds=float(os.environ.get("CAMERA_BUFFER_SECONDS", "6")),
+    fps=float(os.environ.get("CAMERA_BUFFER_FPS", "30")),
+    buffer_max_dimension=int(os.environ.get("CAMERA_BUFFER_MAX_DIMENSION",
+                                            os.environ.get("PAYLOAD_MAX_DIMENSION", "512"))),
+    reconnect_max=float(os.environ.get("SOURCE_RECONNECT_MAX", "30"))
+)
+
+def get_source(source_id, active=True):
+    worker = source_manager.get(source_id)
+    if worker is None:
+        raise HTTPException(status_code=404, detail=f"Source {source_id} not found")
+    if active and not worker.active:
+        raise HTTPException(status_code=400, detail=f"Source {source_id} is not active")
+    return worker
 
 def start_camera_streaming():
-    """Start the camera streaming thread"""
-    global camera_active, camera_thread
-    
-    if not camera_active:
-        camera_active = True
-        camera_thread = threading.Thread(target=camera_capture_thread, daemon=True)
-        camera_thread.start()
-        print("Camera streaming started")
-        return True
-    return False
+    """Start the default source on the first working camera"""
+    worker = source_manager.get(DEFAULT_SOURCE_ID)
+    if worker is not None and worker.active:
+        return False
+    camera_index = find_working_camera()
+    if camera_index is None:
+        raise HTTPException(status_code=500, detail="No working camera found")
+    source_manager.add(DEFAULT_SOURCE_ID, camera_index)
+    print("Camera streaming started")
+    return True
 
 def stop_camera_streaming():
-    """Stop the camera streaming thread"""
-    global camera_active, camera_thread
-    
-    if camera_active:
-        camera_active = False
-        if camera_thread:
-            camera_thread.join(timeout=5)
-        print("Camera streaming stopped")
-        return True
-    return False
-
-def generate_video_stream():
-    """Generator function for video streaming"""
-    while True:
-        try:
-            # Get frame from queue (blocking with timeout)
-            frame_bytes = camera_frame_queue.get(timeout=1.0)
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
-        except queue.Empty:
-            # Send a placeholder frame or continue
-            continue
-        except Exception as e:
-            print(f"Error in video stream: {e}")
-            break
+    """Stop the default source"""
+    if source_manager.remove(DEFAULT_SOURCE_ID) is None:
+        return False
+    print("Camera streaming stopped")
+    return True
+
+def check_stream_options(fps, w, q):
+    if fps is not None and fps <= 0:
+        raise HTTPException(status_code=400, detail="fps must be > 0")
+    if w is not None and w < 16:
+        raise HTTPException(status_code=400, detail="w must be at least 16")
+    if not 10 <= q <= 100:
+        raise HTTPException(status_code=400, detail="q must be between 10 and 100")
+
+async def generate_video_stream(worker, fps=None, w=None, q=DEFAULT_QUALITY):
+    """Generator function for video streaming, one per viewer"""
+    try:
+        async for frame_bytes in worker.broadcaster.subscribe(fps=fps, width=w, quality=q):
+            yield mjpeg_part(frame_bytes)
+    except Exception as e:
+        print(f"Error in video stream: {e}")
+
+def violent_video_event(filename, path, source_id=None):
+    return Event(NEW_VIOLENT_VIDEO, {"filename": filename, "path": path, "source_id": source_id}, alert=True)
+
+def report_event(report, path=None):
+    # "filename" is the report's JSON name, as the file watcher used to announce it
+    json_path = path or report_export_path(report.get("filename") or str(report.get("report_id")))
+    return Event(NEW_REPORT, {
+        "filename": os.path.basename(json_path),
+        "report_id": report.get("report_id"),
+        "video_filename": report.get("filename"),
+        "violence_detected": report.get("violence_detected", False),
+        "classification": report.get("classification", "Unknown"),
+        "path": path
+    }, alert=bool(report.get("violence_detected")))
+
+def incident_event(incident):
+    # Later updates of the same incident replace each other while debounced
+    return Event(INCIDENT_UPDATED, {
+        "incident_id": incident["incident_id"],
+        "report_id": incident["report_id"],
+        "source_id": incident["source_id"],
+        "classification": incident["classification"],
+        "clip_count": incident["clip_count"],
+        "started_at": incident["started_at"],
+        "ended_at": incident["ended_at"]
+    }, key=f"incident-{incident['incident_id']}")
 
 # File system event handler for stored_videos directory
+# Clips stored by the server are announced by the pipeline itself, this only catches files copied in from outside
 class StoredVideoHandler(FileSystemEventHandler):
-    def __init__(self, connection_manager, loop=None):
-        self.connection_manager = connection_manager
-        self.loop = loop
+    def __init__(self, event_bus, own_writes):
+        self.event_bus = event_bus
+        self.own_writes = own_writes
+
+    def on_moved(self, event):
+        # Clips are renamed into place, some platforms report that as a move rather than a create
+        if os.path.dirname(os.path.abspath(event.dest_path)) != os.path.dirname(os.path.abspath(event.src_path)):
+            self.on_created(FileCreatedEvent(event.dest_path))
 
     def on_created(self, event):
         if not event.is_directory and event.src_path.endswith(('.mp4', '.avi', '.mov', '.mkv')):
+            if event.src_path in self.own_writes:
+                return
             filename = os.path.basename(event.src_path)
             print(f"🚨 NEW VIOLENT VIDEO DETECTED: {filename}")
-            message = json.dumps({
-                "type": "new_violent_video",
-                "filename": filename,
-                "timestamp": datetime.utcnow().isoformat(),
-                "path": event.src_path
-            })
-            # Use asyncio.run_coroutine_threadsafe to schedule from thread
-            try:
-                if self.loop and not self.loop.is_closed():
-                    future = asyncio.run_coroutine_threadsafe(
-                        self.connection_manager.broadcast(message), 
-                        self.loop
-                    )
-                    print(f"Scheduled broadcast for {filename}")
-                else:
-                    print("No event loop available for broadcasting")
-            except Exception as e:
-                print(f"Error broadcasting message: {e}")
+            self.event_bus.publish_threadsafe(violent_video_event(filename, event.src_path))
 
 # File system event handler for reports directory
+# Like StoredVideoHandler, only for report files the server did not write itself
 class ReportsHandler(FileSystemEventHandler):
-    def __init__(self, connection_manager, loop=None):
-        self.connection_manager = connection_manager
-        self.loop = loop
+    def __init__(self, event_bus, own_writes):
+        self.event_bus = event_bus
+        self.own_writes = own_writes
 
     def on_created(self, event):
         if not event.is_directory and event.src_path.endswith('.json'):
+            if event.src_path in self.own_writes:
+                return
             filename = os.path.basename(event.src_path)
             print(f"📄 NEW REPORT GENERATED: {filename}")
             
@@ -193,31 +226,7 @@ class ReportsHandler(FileSystemEventHandler):
             try:
                 with open(event.src_path, 'r') as f:
                     report_data = json.load(f)
-                
-                message = json.dumps({
-                    "type": "new_report",
-                    "filename": filename,
-                    "report_id": report_data.get("report_id"),
-                    "video_filename": report_data.get("filename"),
-                    "violence_detected": report_data.get("violence_detected", False),
-                    "classification": report_data.get("classification", "Unknown"),
-                    "timestamp": datetime.utcnow().isoformat(),
-                    "path": event.src_path
-                })
-                
-                # Use asyncio.run_coroutine_threadsafe to schedule from thread
-                try:
-                    if self.loop and not self.loop.is_closed():
-                        future = asyncio.run_coroutine_threadsafe(
-                            self.connection_manager.broadcast(message), 
-                            self.loop
-                        )
-                        print(f"Scheduled report broadcast for {filename}")
-                    else:
-                        print("No event loop available for broadcasting")
-                except Exception as e:
-                    print(f"Error broadcasting report message: {e}")
-                    
+                self.event_bus.publish_threadsafe(report_event(report_data, event.src_path))
             except Exception as e:
                 print(f"Error reading report file {filename}: {e}")
 
@@ -230,236 +239,479 @@ reports_dir = "debug_videos/reports"
 if not os.path.exists(reports_dir):
     os.makedirs(reports_dir)
 
+debug_videos_dir = "debug_videos"
+
+# Video listings are served from memory, built at startup and updated from the file observers
+stored_videos_index = VideoIndex(stored_videos_dir, "violent")
+debug_videos_index = VideoIndex(debug_videos_dir, "non_violent")
+
 # Global variables for observers (will be initialized in main)
 video_observer = None
 video_event_handler = None
 reports_observer = None
 reports_event_handler = None
 
-def load_reports():
-    """Load all reports from individual JSON files"""
-    reports = []
-    if not os.path.exists(REPORTS_DIR):
-        os.makedirs(REPORTS_DIR)
-        return reports
+# Reports live in an indexed SQLite store. The per-report JSON files in REPORTS_DIR are an optional
+# export (REPORTS_JSON_EXPORT=1 turns it on), new reports are announced on the event bus either way
+report_store = ReportStore(os.environ.get("REPORTS_DB", "reports.db"))
+REPORTS_JSON_EXPORT = os.environ.get("REPORTS_JSON_EXPORT", "0") == "1"
+
+# Flagged clips from the same source less than INCIDENT_GAP_SECONDS apart are one incident with one
+# report, updated as clips join. Anonymous uploads share the "upload" source, so they are never known_source
+# and never answered from another upload's verdict
+incident_store = IncidentStore(
+    os.environ.get("REPORTS_DB", "reports.db"),
+    gap=float(os.environ.get("INCIDENT_GAP_SECONDS", "10")),
+    max_duration=float(os.environ.get("INCIDENT_MAX_SECONDS", "600"))
+)
+UNGROUPED_SOURCES = ("upload",)
+
+def report_export_path(video_filename):
+    """JSON export path for a report, same name as the video"""
+    # Extract filename without extension and add .json
+    base_name = os.path.splitext(video_filename)[0]
+    return os.path.join(REPORTS_DIR, f"{base_name}.json")
+
+def save_report(report, video_filename, replace=False):
+    """Save a report to the report store and export it as JSON with the same name as the video.
+
+    `replace` overwrites the stored report with the same report_id (incident reports are updated in place).
+    """
+    report_store.add(report, replace=replace)
+    
+    if not REPORTS_JSON_EXPORT:
+        return
     
-    for filename in os.listdir(REPORTS_DIR):
-        if filename.endswith('.json'):
-            file_path = os.path.join(REPORTS_DIR, filename)
-            try:
-                with open(file_path, 'r') as f:
-                    report = json.load(f)
-                    reports.append(report)
-            except (json.JSONDecodeError, FileNotFoundError) as e:
-                print(f"Error loading report {filename}: {str(e)}")
-    return reports
-
-def save_report(report, video_filename):
-    """Save individual report to JSON file with same name as video"""
     if not os.path.exists(REPORTS_DIR):
         os.makedirs(REPORTS_DIR)
     
-    # Extract filename without extension and add .json
-    base_name = os.path.splitext(video_filename)[0]
-    report_filename = f"{base_name}.json"
-    report_path = os.path.join(REPORTS_DIR, report_filename)
-    
+    report_path = report_export_path(video_filename)
+    own_writes.add(report_path)
     try:
-        with open(report_path, 'w') as f:
+        # Written next to the final path and renamed, readers never see a partial file
+        temp_path = os.path.join(REPORTS_DIR, f".{os.path.basename(report_path)}.tmp")
+        with open(temp_path, 'w') as f:
             json.dump(report, f, indent=2)
+        os.replace(temp_path, report_path)
         print(f"Report saved to: {report_path}")
     except Exception as e:
-        print(f"Error saving report {report_filename}: {str(e)}")
+        print(f"Error saving report {report_path}: {str(e)}")
 
 def delete_report_file(report_id):
-    """Delete individual report file by report_id"""
-    if not os.path.exists(REPORTS_DIR):
+    """Delete a report by report_id, along with its JSON export"""
+    report = report_store.delete(report_id)
+    if report is None:
         return False
     
-    for filename in os.listdir(REPORTS_DIR):
-        if filename.endswith('.json'):
-            file_path = os.path.join(REPORTS_DIR, filename)
-            try:
-                with open(file_path, 'r') as f:
-                    report = json.load(f)
-                    if report.get('report_id') == report_id:
-                        os.remove(file_path)
-                        print(f"Deleted report file: {filename}")
-                        return True
-            except (json.JSONDecodeError, FileNotFoundError) as e:
-                print(f"Error reading report {filename}: {str(e)}")
-    return False
-
-@app.post("/analyze_clip", summary="Upload and analyze a video clip")
-async def analyze_clip(file: UploadFile = File(...)):
-    # Create directories for temporary processing and permanent storage
-    temp_dir = "temp_clips"
+    if report.get("filename"):
+        report_path = report_export_path(report["filename"])
+        if os.path.exists(report_path):
+            os.remove(report_path)
+            print(f"Deleted report file: {report_path}")
+    return True
+
+# Pipeline result keys copied into the report entry when present
+ANALYSIS_METADATA_FIELDS = ("unchanged", "reused_from", "skipped", "motion_score", "fight_probability", "payload")
+
+def build_report_entry(filename, analysis, default_classification="Unknown"):
+    """Build the stored report entry from an AnalysisPipeline.run() result"""
+    report_data = analysis["report"]
+    report_entry = {
+        "report_id": report_store.new_id(),
+        "filename": filename,
+        "analysis_timestamp_utc": datetime.utcnow().isoformat(),
+        "violence_detected": analysis["violence_detected"],
+        "classification": report_data.get("classification", default_classification),
+        "detailed_report": report_data.get("detailed_report", ""),
+        "report": report_data  # Keep full report for backward compatibility
+    }
+    for field in ANALYSIS_METADATA_FIELDS:
+        if field in analysis:
+            report_entry[field] = analysis[field]
+    return report_entry
+
+def clip_span(report_entry):
+    """(start, end) timestamps of a clip, from its window when it was cut from a source, else the analysis time"""
+    end = time.time()
+    try:
+        start = datetime.fromisoformat(report_entry["window_start"]).replace(tzinfo=timezone.utc).timestamp()
+        end = datetime.fromisoformat(report_entry["window_end"]).replace(tzinfo=timezone.utc).timestamp()
+    except (KeyError, TypeError, ValueError):
+        start = end
+    return start, end
+
+# Uploads are streamed once into temp_clips and later renamed into place, so both must be on one filesystem
+clip_ingest = StreamingIngest(
+    staging_dir="temp_clips",
+    max_bytes=int(os.environ.get("UPLOAD_MAX_BYTES", str(200 * 1024 * 1024))),
+    max_duration=float(os.environ.get("UPLOAD_MAX_SECONDS", "120"))
+)
+
+async def process_clip(temp_file_path, filename, source, default_classification="Unknown", extra_response=None,
+                       images=None, fps=None):
+    """Analyze a clip, store it with its report and return the response data. Runs as a job"""
     violent_videos_dir = "stored_videos"
     non_violent_videos_dir = "debug_videos"
     
-    if not os.path.exists(temp_dir):
-        os.makedirs(temp_dir)
     if not os.path.exists(violent_videos_dir):
         os.makedirs(violent_videos_dir)
     if not os.path.exists(non_violent_videos_dir):
         os.makedirs(non_violent_videos_dir)
     
-    temp_file_path = os.path.join(temp_dir, file.filename)
-    violent_storage_path = os.path.join(violent_videos_dir, file.filename)
-    non_violent_storage_path = os.path.join(non_violent_videos_dir, file.filename)
-    
+    known_source = source is not None and source not in UNGROUPED_SOURCES
     try:
-        # Save uploaded video to temporary location
-        with open(temp_file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
         # Check if video contains violent content
-        violence_detected = analyze_video(temp_file_path)
+        # Decode the clip once and share the sampled frames between the analysis stages
+        # A clip that would continue an open incident only needs a short report, the incident report has the details
+        continues_incident = known_source and await asyncio.to_thread(incident_store.is_open, source)
+        pipeline = AnalysisPipeline(temp_file_path, source=source if known_source else None, images=images, fps=fps,
+                                    detailed_report=not continues_incident)
+        analysis = await pipeline.run()
+        violence_detected = analysis["violence_detected"]
         
         response_data = {
-            "filename": file.filename,
+            "filename": filename,
             "violence_detected": violence_detected,
             "timestamp": datetime.utcnow().isoformat(),
+            "unchanged": analysis.get("unchanged", False),
+            "motion_score": analysis.get("motion_score"),
+            **(extra_response or {}),
             "classification": None,
             "report": None
         }
         
         print("Violence status: " + str(violence_detected))
         
-        # If violence is detected, generate a detailed report and save video
+        report_data = analysis["report"]
+        response_data["report"] = report_data
+        response_data["classification"] = report_data.get("classification", default_classification)
+        
+        # Store the report in the file
+        started = time.perf_counter()
+        report_entry = build_report_entry(filename, analysis, default_classification=default_classification)
+        report_entry.update(extra_response or {})
+        incident = None
+        if violence_detected and known_source:
+            # The clip joins its incident, whose consolidated report replaces the per-clip one
+            # It is saved under the incident lock, so a slower clip never overwrites a newer snapshot
+            incident, created = await asyncio.to_thread(
+                incident_store.add_clip, source, report_entry, *clip_span(report_entry),
+                save_report=lambda report: save_report(report, report["filename"], replace=True)
+            )
+            report_entry = incident["report"]
+            response_data["incident_id"] = incident["incident_id"]
+            response_data["incident_report_id"] = report_entry["report_id"]
+        else:
+            await asyncio.to_thread(save_report, report_entry, filename)
+        if incident is None or created:
+            event_bus.publish(report_event(report_entry))
+        else:
+            event_bus.publish(incident_event(incident))
+        
+        # Violent clips are kept permanently, the rest go to the debug folder for debugging purposes
+        # The staged file is renamed into place, the clip is never copied
         if violence_detected:
-            report_data = generate_report(temp_file_path)
-            response_data["report"] = report_data
-            response_data["classification"] = report_data.get("classification", "Unknown")
-            
-            # Store the report in the file
-            report_entry = {
-                "report_id": int(time.time() * 1000),
-                "filename": file.filename,
-                "analysis_timestamp_utc": datetime.utcnow().isoformat(),
-                "violence_detected": True,
-                "classification": report_data.get("classification", "Unknown"),
-                "detailed_report": report_data.get("detailed_report", ""),
-                "report": report_data  # Keep full report for backward compatibility
-            }
-            save_report(report_entry, file.filename)
-            
-            # Save video permanently to violent videos directory
-            shutil.copy2(temp_file_path, violent_storage_path)
-            response_data["video_saved"] = True
-            response_data["storage_path"] = violent_storage_path
+            own_writes.add(os.path.join(violent_videos_dir, filename))
+            storage_path = place_file(temp_file_path, violent_videos_dir, filename)
+            event_bus.publish(violent_video_event(filename, storage_path, (extra_response or {}).get("source_id")))
             response_data["storage_type"] = "violent"
         else:
-            # No violence detected, save to debug folder for debugging purposes
-            shutil.copy2(temp_file_path, non_violent_storage_path)
-
-            report_data = generate_report(temp_file_path)
-            response_data["report"] = report_data
-
-            report_entry = {
-                "report_id": int(time.time() * 1000),
-                "filename": file.filename,
-                "analysis_timestamp_utc": datetime.utcnow().isoformat(),
-                "violence_detected": False,
-                "classification": report_data.get("classification", "Unknown"),
-                "detailed_report": report_data.get("detailed_report", ""),
-                "report": report_data  # Keep full report for backward compatibility
-            }
-
-            save_report(report_entry, file.filename)
-
-            # Actual code
-            # report_data = generate_report(temp_file_path)
-            # response_data["report"] = report_data
-            response_data["video_saved"] = True
-            response_data["storage_path"] = non_violent_storage_path
+            storage_path = place_file(temp_file_path, non_violent_videos_dir, filename)
             response_data["storage_type"] = "non_violent"
+        response_data["video_saved"] = True
+        response_data["storage_path"] = storage_path
+        pipeline.timings["store"] = time.perf_counter() - started
+        response_data["timings"] = pipeline.timings
         
-
-        return JSONResponse(content=response_data)
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
+        return response_data
         
     finally:
         # Clean up temporary file
+        if os.path.exists(temp_file_path):
+            try:
+                os.remove(temp_file_path)
+            except Exception as e:
+                print(f"Warning: Could not delete temporary file {temp_file_path}: {str(e)}")
+
+async def run_clip_job(kind, wait, temp_file_path, filename, **kwargs):
+    """Queue process_clip. With wait the response is the analysis result, otherwise the job id"""
+    try:
+        job = job_queue.submit(kind, lambda: process_clip(temp_file_path, filename, **kwargs), filename=filename)
+    except QueueFullError as e:
         if os.path.exists(temp_file_path):
             os.remove(temp_file_path)
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    if not wait:
+        return JSONResponse(status_code=202, content={
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "status_url": f"/jobs/{job['job_id']}"
+        })
+    
+    try:
+        response_data = await job_queue.wait(job["job_id"])
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
+    return JSONResponse(content=dict(response_data, job_id=job["job_id"]))
+
+# The upload is read from the request stream directly (not through UploadFile), so document the form here
+ANALYZE_CLIP_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {
+                        "file": {"type": "string", "format": "binary"},
+                        "source": {"type": "string", "default": "upload"}
+                    },
+                    "required": ["file"]
+                }
+            },
+            "video/mp4": {"schema": {"type": "string", "format": "binary"}}
+        }
+    }
+}
 
-@app.get("/reports", summary="Get all generated incident reports")
-async def get_reports():
-    reports = load_reports()
-    return JSONResponse(content={"reports": sorted(reports, key=lambda r: r['report_id'], reverse=True)})
+@app.post("/analyze_clip", summary="Upload and analyze a video clip", openapi_extra=ANALYZE_CLIP_BODY)
+async def analyze_clip(request: Request, wait: bool = True, source: str = "upload"):
+    # Stream the upload into temp_clips in a single write, hashing and size-checking as it arrives
+    try:
+        clip = await clip_ingest.receive(request)
+    except IngestError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
+    
+    return await run_clip_job(
+        "analyze_clip", wait, clip.path, clip.filename,
+        source=clip.fields.get("source", source),
+        extra_response={"content_sha256": clip.sha256, "size_bytes": clip.size}
+    )
+
+@app.get("/jobs", summary="Get job queue statistics")
+async def get_jobs():
+    return JSONResponse(content=job_queue.stats())
+
+@app.get("/jobs/{job_id}", summary="Get the status of an analysis job")
+async def get_job(job_id: str):
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JSONResponse(content=job)
+
+def encode_cursor(report_id):
+    return base64.urlsafe_b64encode(str(report_id).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def gzip_etag(etag):
+    """The gzip-encoded body is a different representation, so it gets its own strong ETag"""
+    return etag[:-1] + '-gzip"'
+
+def etag_matches(request, etag):
+    """The variant of `etag` (identity or gzip) the client already has, or None"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    for variant in (etag, gzip_etag(etag)):
+        if "*" in candidates or variant in candidates:
+            return variant
+    return None
+
+def not_modified(etag):
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"})
+
+def cached_json_response(request, content, etag):
+    """JSON response with an ETag, a 304 when the client already has it, gzip when accepted"""
+    matched = etag_matches(request, etag)
+    if matched:
+        return not_modified(matched)
+    
+    headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "Accept-Encoding"}
+    body = json.dumps(content).encode("utf-8")
+    if len(body) >= 1024 and "gzip" in request.headers.get("accept-encoding", ""):
+        body = gzip.compress(body, compresslevel=5)
+        headers["Content-Encoding"] = "gzip"
+        headers["ETag"] = gzip_etag(etag)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/reports", summary="Get generated incident reports")
+async def get_reports(
+    request: Request,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    violence_detected: Optional[bool] = None,
+    classification: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    fields: str = "full"
+):
+    """Reports, newest first. Without `limit` every matching report is returned.
+    
+    `cursor` is the `next_cursor` of the previous page, `since`/`until` are ISO timestamps and
+    `fields=summary` leaves out the report text.
+    """
+    if limit is not None and not 1 <= limit <= 500:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 500")
+    if fields not in ("full", "summary"):
+        raise HTTPException(status_code=400, detail="fields must be 'full' or 'summary'")
+    
+    # The ETag covers the store version and the query, so it is checked before touching the database
+    query_key = f"{report_store.version}|{request.url.query}"
+    etag = '"' + hashlib.sha1(query_key.encode("utf-8")).hexdigest() + '"'
+    matched = etag_matches(request, etag)
+    if matched:
+        return not_modified(matched)
+    
+    reports, has_more = await asyncio.to_thread(
+        report_store.query,
+        violence_detected=violence_detected,
+        classification=classification,
+        since=since,
+        until=until,
+        before_id=decode_cursor(cursor) if cursor else None,
+        limit=limit,
+        summary=fields == "summary"
+    )
+    content = {
+        "reports": reports,
+        "next_cursor": encode_cursor(reports[-1]["report_id"]) if has_more else None
+    }
+    return cached_json_response(request, content, etag)
 
 @app.get("/reports/{report_id}", summary="Get a specific report by ID")
 async def get_report(report_id: int):
-    reports = load_reports()
-    for report in reports:
-        if report['report_id'] == report_id:
-            return JSONResponse(content=report)
+    report = report_store.get(report_id)
+    if report is not None:
+        return JSONResponse(content=report)
     raise HTTPException(status_code=404, detail="Report not found")
 
 @app.delete("/reports/{report_id}", summary="Delete a specific report by ID")
 async def delete_report(report_id: int):
-    if delete_report_file(report_id):
+    if await asyncio.to_thread(delete_report_file, report_id):
         return JSONResponse(content={"message": "Report deleted successfully"})
     else:
         raise HTTPException(status_code=404, detail="Report not found")
 
+@app.get("/incidents", summary="Get incidents, groups of flagged clips from the same source")
+async def get_incidents(
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    source_id: Optional[str] = None,
+    status: Optional[str] = None,
+    fields: str = "full"
+):
+    """Incidents, newest first. `status` is "open" or "closed", `cursor` is the `next_cursor` of the previous page"""
+    if not 1 <= limit <= 500:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 500")
+    if status not in (None, "open", "closed"):
+        raise HTTPException(status_code=400, detail="status must be 'open' or 'closed'")
+    if fields not in ("full", "summary"):
+        raise HTTPException(status_code=400, detail="fields must be 'full' or 'summary'")
+    incidents, has_more = await asyncio.to_thread(
+        incident_store.query,
+        source_id=source_id,
+        status=status,
+        before_id=decode_cursor(cursor) if cursor else None,
+        limit=limit,
+        summary=fields == "summary"
+    )
+    return JSONResponse(content={
+        "incidents": incidents,
+        "next_cursor": encode_cursor(incidents[-1]["incident_id"]) if has_more else None
+    })
+
+@app.get("/incidents/stats", summary="Get incident statistics")
+async def get_incident_stats():
+    return JSONResponse(content=await asyncio.to_thread(incident_store.stats))
+
+@app.get("/incidents/{incident_id}", summary="Get an incident with its clips and consolidated report")
+async def get_incident(incident_id: int):
+    incident = await asyncio.to_thread(incident_store.get, incident_id)
+    if incident is None:
+        raise HTTPException(status_code=404, detail="Incident not found")
+    return JSONResponse(content=incident)
+
+def list_videos(index, offset, limit, sort, order):
+    if sort not in SORT_KEYS:
+        raise HTTPException(status_code=400, detail=f"sort must be one of {', '.join(SORT_KEYS)}")
+    if order not in ("asc", "desc"):
+        raise HTTPException(status_code=400, detail="order must be 'asc' or 'desc'")
+    if offset < 0 or (limit is not None and limit < 1):
+        raise HTTPException(status_code=400, detail="offset must be >= 0 and limit >= 1")
+    videos, total = index.list(offset=offset, limit=limit, sort=sort, order=order)
+    return JSONResponse(content={"videos": videos, "total": total, "offset": offset, "limit": limit})
+
 @app.get("/stored_videos", summary="Get list of violent videos")
-async def get_stored_videos():
-    storage_dir = "stored_videos"
-    if not os.path.exists(storage_dir):
-        return JSONResponse(content={"videos": []})
-    
-    videos = []
-    for filename in os.listdir(storage_dir):
-        file_path = os.path.join(storage_dir, filename)
-        if os.path.isfile(file_path):
-            stat = os.stat(file_path)
-            videos.append({
-                "filename": filename,
-                "size_bytes": stat.st_size,
-                "created_at": datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                "modified_at": datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                "type": "violent"
-            })
-    
-    return JSONResponse(content={"videos": sorted(videos, key=lambda v: v['created_at'], reverse=True)})
+async def get_stored_videos(offset: int = 0, limit: Optional[int] = None, sort: str = "created_at", order: str = "desc"):
+    return list_videos(stored_videos_index, offset, limit, sort, order)
 
 @app.get("/debug_videos", summary="Get list of non-violent debug videos")
-async def get_debug_videos():
-    storage_dir = "debug_videos"
-    if not os.path.exists(storage_dir):
-        return JSONResponse(content={"videos": []})
-    
-    videos = []
-    for filename in os.listdir(storage_dir):
-        file_path = os.path.join(storage_dir, filename)
-        if os.path.isfile(file_path):
-            stat = os.stat(file_path)
-            videos.append({
-                "filename": filename,
-                "size_bytes": stat.st_size,
-                "created_at": datetime.fromtimestamp(stat.st_ctime).isoformat(),
-                "modified_at": datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                "type": "non_violent"
-            })
-    
-    return JSONResponse(content={"videos": sorted(videos, key=lambda v: v['created_at'], reverse=True)})
+async def get_debug_videos(offset: int = 0, limit: Optional[int] = None, sort: str = "created_at", order: str = "desc"):
+    return list_videos(debug_videos_index, offset, limit, sort, order)
 
-@app.get("/video_stream", summary="Live camera video stream")
-async def video_stream():
-    """Endpoint for live camera video streaming"""
+@app.get("/sources", summary="List capture sources")
+async def list_sources():
+    return JSONResponse(content=source_manager.stats())
+
+@app.post("/sources", summary="Add a capture source and start it")
+async def add_source(source_id: str, uri: str):
+    """`uri` is a local device index, an rtsp:// (or other stream) URL, or a video file to loop"""
+    try:
+        worker = await asyncio.to_thread(source_manager.add, source_id, uri)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return JSONResponse(content=worker.stats())
+
+@app.get("/sources/{source_id}", summary="Get capture source statistics")
+async def get_source_stats(source_id: str):
+    return JSONResponse(content=get_source(source_id, active=False).stats())
+
+@app.delete("/sources/{source_id}", summary="Stop and remove a capture source")
+async def remove_source(source_id: str):
+    await monitor_manager.stop(source_id)
+    worker = await asyncio.to_thread(source_manager.remove, source_id)
+    if worker is None:
+        raise HTTPException(status_code=404, detail=f"Source {source_id} not found")
+    return JSONResponse(content={"message": f"Source {source_id} removed"})
+
+@app.get("/sources/{source_id}/video_stream", summary="Live video stream of a source")
+async def source_video_stream(source_id: str, fps: Optional[float] = None, w: Optional[int] = None, q: int = DEFAULT_QUALITY):
+    """MJPEG stream capped at `fps` frames per second, at most `w` pixels wide, JPEG quality `q`"""
+    check_stream_options(fps, w, q)
     return StreamingResponse(
-        generate_video_stream(),
-        media_type="multipart/x-mixed-replace; boundary=frame"
+        generate_video_stream(get_source(source_id), fps, w, q),
+        media_type=f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}"
     )
 
+@app.post("/sources/{source_id}/capture_and_analyze", summary="Capture a clip from a source and analyze it")
+async def source_capture_and_analyze(source_id: str, wait: bool = True, pre_seconds: float = 3.0, post_seconds: float = 0.0):
+    return await capture_clip(get_source(source_id), wait, pre_seconds, post_seconds)
+
+@app.get("/video_stream", summary="Live camera video stream")
+async def video_stream(fps: Optional[float] = None, w: Optional[int] = None, q: int = DEFAULT_QUALITY):
+    """Endpoint for live camera video streaming"""
+    return await source_video_stream(DEFAULT_SOURCE_ID, fps, w, q)
+
+@app.get("/video_stream/stats", summary="Get live stream viewer statistics")
+async def video_stream_stats():
+    return JSONResponse(content=get_source(DEFAULT_SOURCE_ID, active=False).broadcaster.stats())
+
 @app.post("/camera/start", summary="Start camera streaming")
 async def start_camera():
     """Start the camera streaming"""
-    success = start_camera_streaming()
+    success = await asyncio.to_thread(start_camera_streaming)
     if success:
         return JSONResponse(content={"message": "Camera streaming started", "active": True})
     else:
@@ -468,7 +720,8 @@ async def start_camera():
 @app.post("/camera/stop", summary="Stop camera streaming")
 async def stop_camera():
     """Stop the camera streaming"""
-    success = stop_camera_streaming()
+    await monitor_manager.stop(DEFAULT_SOURCE_ID)
+    success = await asyncio.to_thread(stop_camera_streaming)
     if success:
         return JSONResponse(content={"message": "Camera streaming stopped", "active": False})
     else:
@@ -477,22 +730,67 @@ async def stop_camera():
 @app.get("/camera/status", summary="Get camera status")
 async def camera_status():
     """Get current camera streaming status"""
+    worker = source_manager.get(DEFAULT_SOURCE_ID)
+    active = worker is not None and worker.active
     return JSONResponse(content={
-        "active": camera_active,
-        "has_camera": find_working_camera() is not None
+        "active": active,
+        "has_camera": find_working_camera() is not None,
+        "camera_index": worker.uri if active else None,
+        **camera_registry.status()
     })
 
-@app.post("/capture_and_analyze", summary="Capture video clip from camera and analyze it")
-async def capture_and_analyze():
-    """Capture a 3-second video clip from the active camera and analyze it for violence"""
-    global camera_active
+@app.post("/camera/rescan", summary="Probe the cameras again in the background")
+async def rescan_cameras():
+    camera_registry.request_refresh()
+    return JSONResponse(content={"message": "Camera rescan requested"})
+
+async def capture_clip(worker, wait, pre_seconds, post_seconds):
+    """Cut a clip around now from a source's ring buffer and analyze it for violence.
+
+    `pre_seconds` of already buffered video before the request and `post_seconds` after it
+    are included. With no post-trigger window the clip is available immediately.
+    """
+    ring = worker.ring
+    if worker.state != "streaming":
+        raise HTTPException(status_code=503, detail=f"Source {worker.source_id} is {worker.state}")
+    if pre_seconds < 0 or post_seconds < 0 or pre_seconds + post_seconds <= 0:
+        raise HTTPException(status_code=400, detail="pre_seconds and post_seconds must be >= 0 and not both 0")
+    if pre_seconds + post_seconds > ring.seconds:
+        raise HTTPException(status_code=400, detail=f"Clips can be at most {ring.seconds} seconds long")
     
-    if not camera_active:
-        raise HTTPException(status_code=400, detail="Camera streaming is not active")
+    trigger = time.time()
+    if post_seconds:
+        # Wait until the post-trigger window has been captured
+        deadline = trigger + post_seconds + 2.0
+        while (ring.latest_timestamp() or 0) < trigger + post_seconds and time.time() < deadline:
+            await asyncio.sleep(0.05)
     
-    camera_index = find_working_camera()
-    if camera_index is None:
-        raise HTTPException(status_code=500, detail="No working camera found")
+    temp_file_path, temp_filename, frames, fps = await cut_clip(worker, trigger - pre_seconds, trigger + post_seconds)
+    
+    # Analyze the recorded video
+    return await run_clip_job(
+        "capture_and_analyze", wait, temp_file_path, temp_filename,
+        source=worker.source_id,
+        default_classification="Safe",
+        extra_response={
+            "source_id": worker.source_id,
+            "frames_recorded": len(frames),
+            "pre_seconds": pre_seconds,
+            "post_seconds": post_seconds
+        },
+        images=frames,
+        fps=fps
+    )
+
+async def cut_clip(worker, start, end, prefix=None):
+    """Copy the frames between two timestamps out of a source's ring buffer and write them to a temp clip.
+
+    Returns (temp_file_path, temp_filename, frames, fps).
+    """
+    frames, timestamps = worker.ring.window(start, end)
+    if len(frames) == 0:
+        raise HTTPException(status_code=500, detail="No frames were recorded")
+    fps = estimate_fps(timestamps)
     
     # Create temporary file for video
     temp_dir = "temp_clips"
@@ -500,127 +798,180 @@ async def capture_and_analyze():
         os.makedirs(temp_dir)
     
     timestamp = datetime.utcnow().strftime("%Y%m%d_%H%M%S_%f")[:-3]
-    temp_filename = f"frontend_clip_{timestamp}.mp4"
+    if prefix is None:
+        prefix = "frontend_clip" if worker.source_id == DEFAULT_SOURCE_ID else f"{worker.source_id}_clip"
+    temp_filename = safe_filename(f"{prefix}_{timestamp}.mp4")
     temp_file_path = os.path.join(temp_dir, temp_filename)
     
     try:
-        # Open camera for recording
-        cap = cv2.VideoCapture(camera_index)
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        cap.set(cv2.CAP_PROP_FPS, 30)
-        
-        if not cap.isOpened():
-            raise HTTPException(status_code=500, detail="Could not open camera for recording")
-        
-        # Define codec and create VideoWriter
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(temp_file_path, fourcc, 30.0, (640, 480))
-        
-        # Record for 3 seconds
-        start_time = time.time()
-        frames_recorded = 0
-        
-        while time.time() - start_time < 3.0:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            out.write(frame)
-            frames_recorded += 1
-        
-        # Release resources
-        out.release()
-        cap.release()
-        
-        if frames_recorded == 0:
-            raise HTTPException(status_code=500, detail="No frames were recorded")
-        
-        print(f"Recorded {frames_recorded} frames to {temp_file_path}")
-        
-        # Analyze the recorded video
-        violence_detected = analyze_video(temp_file_path)
-        
-        response_data = {
-            "filename": temp_filename,
-            "violence_detected": violence_detected,
-            "timestamp": datetime.utcnow().isoformat(),
-            "frames_recorded": frames_recorded,
-            "classification": None,
-            "report": None
-        }
-        
-        # Storage directories
-        violent_videos_dir = "stored_videos"
-        non_violent_videos_dir = "debug_videos"
-        
-        if not os.path.exists(violent_videos_dir):
-            os.makedirs(violent_videos_dir)
-        if not os.path.exists(non_violent_videos_dir):
-            os.makedirs(non_violent_videos_dir)
-        
-        # If violence is detected, generate a detailed report and save video
-        if violence_detected:
-            report_data = generate_report(temp_file_path)
-            response_data["report"] = report_data
-            response_data["classification"] = report_data.get("classification", "Unknown")
-            
-            # Store the report
-            report_entry = {
-                "report_id": int(time.time() * 1000),
-                "filename": temp_filename,
-                "analysis_timestamp_utc": datetime.utcnow().isoformat(),
-                "violence_detected": True,
-                "classification": report_data.get("classification", "Unknown"),
-                "detailed_report": report_data.get("detailed_report", ""),
-                "report": report_data
-            }
-            save_report(report_entry, temp_filename)
-            
-            # Save video permanently to violent videos directory
-            violent_storage_path = os.path.join(violent_videos_dir, temp_filename)
-            shutil.copy2(temp_file_path, violent_storage_path)
-            response_data["video_saved"] = True
-            response_data["storage_path"] = violent_storage_path
-            response_data["storage_type"] = "violent"
-        else:
-            # No violence detected, save to debug folder
-            non_violent_storage_path = os.path.join(non_violent_videos_dir, temp_filename)
-            shutil.copy2(temp_file_path, non_violent_storage_path)
-            
-            # Generate report for non-violent content too
-            report_data = generate_report(temp_file_path)
-            response_data["report"] = report_data
-            response_data["classification"] = report_data.get("classification", "Safe")
-            
-            report_entry = {
-                "report_id": int(time.time() * 1000),
-                "filename": temp_filename,
-                "analysis_timestamp_utc": datetime.utcnow().isoformat(),
-                "violence_detected": False,
-                "classification": report_data.get("classification", "Safe"),
-                "detailed_report": report_data.get("detailed_report", ""),
-                "report": report_data
-            }
-            save_report(report_entry, temp_filename)
-            
-            response_data["video_saved"] = True
-            response_data["storage_path"] = non_violent_storage_path
-            response_data["storage_type"] = "non_violent"
-        
-        return JSONResponse(content=response_data)
-        
+        # The clip is still written so it can be stored and served, but analysis reads the frames from memory
+        frames_recorded = await asyncio.to_thread(write_clip, frames, temp_file_path, fps)
+        print(f"Wrote {frames_recorded} buffered frames to {temp_file_path}")
     except Exception as e:
-        print(f"Error in capture_and_analyze: {str(e)}")
+        print(f"Error writing clip: {str(e)}")
+        if os.path.exists(temp_file_path):
+            os.remove(temp_file_path)
         raise HTTPException(status_code=500, detail=f"An error occurred: {str(e)}")
-    
-    finally:
-        # Clean up temporary file
+    return temp_file_path, temp_filename, frames, fps
+
+async def analyze_window(worker, start, end):
+    """Analyze one monitor window through the job queue and return the result"""
+    temp_file_path, temp_filename, frames, fps = await cut_clip(worker, start, end, prefix=f"{worker.source_id}_monitor")
+    try:
+        job = job_queue.submit(
+            "monitor",
+            lambda: process_clip(
+                temp_file_path, temp_filename,
+                source=worker.source_id,
+                default_classification="Safe",
+                extra_response={
+                    "source_id": worker.source_id,
+                    "frames_recorded": len(frames),
+                    "window_start": datetime.utcfromtimestamp(start).isoformat(),
+                    "window_end": datetime.utcfromtimestamp(end).isoformat()
+                },
+                images=frames,
+                fps=fps
+            ),
+            filename=temp_filename
+        )
+    except QueueFullError:
         if os.path.exists(temp_file_path):
-            try:
-                os.remove(temp_file_path)
-            except Exception as e:
-                print(f"Warning: Could not delete temporary file {temp_file_path}: {str(e)}")
+            os.remove(temp_file_path)
+        raise
+    return dict(await job_queue.wait(job["job_id"]), job_id=job["job_id"])
+
+async def publish_monitor_result(monitor, window, result, error):
+    result = result or {}
+    event_bus.publish(Event(MONITOR_RESULT, {
+        "source_id": monitor.source_id,
+        "mode": monitor.mode,
+        "window_start": datetime.utcfromtimestamp(window["start"]).isoformat(),
+        "window_end": datetime.utcfromtimestamp(window["end"]).isoformat(),
+        "segment_reason": window.get("reason"),
+        "peak_activity": window.get("peak_score"),
+        "job_id": result.get("job_id"),
+        "filename": result.get("filename"),
+        "violence_detected": result.get("violence_detected"),
+        "classification": result.get("classification"),
+        "skipped": result.get("skipped"),
+        "error": error
+    }, alert=bool(result.get("violence_detected"))))
+
+# Server-side continuous monitoring, one monitor per source. By default clips follow activity
+# (see segmenter.py); MONITOR_MODE=window analyzes fixed sliding windows instead
+monitor_manager = MonitorManager(
+    analyze_window,
+    on_result=publish_monitor_result,
+    mode=os.environ.get("MONITOR_MODE", "segment"),
+    window=float(os.environ.get("MONITOR_WINDOW_SECONDS", "3")),
+    stride=float(os.environ.get("MONITOR_STRIDE_SECONDS", "2")),
+    max_in_flight=int(os.environ.get("MONITOR_MAX_IN_FLIGHT", "2")),
+    segment_options={
+        "start_threshold": float(os.environ.get("SEGMENT_START_THRESHOLD", "0.02")),
+        "stop_threshold": float(os.environ.get("SEGMENT_STOP_THRESHOLD", "0.01")),
+        "quiet_seconds": float(os.environ.get("SEGMENT_QUIET_SECONDS", "1")),
+        "min_length": float(os.environ.get("SEGMENT_MIN_SECONDS", "1")),
+        "max_length": float(os.environ.get("SEGMENT_MAX_SECONDS", "5")),
+        "pre_roll": float(os.environ.get("SEGMENT_PRE_ROLL_SECONDS", "1"))
+    }
+)
+
+@app.get("/monitors", summary="Get the status of every source monitor")
+async def list_monitors():
+    return JSONResponse(content=monitor_manager.stats())
+
+@app.post("/sources/{source_id}/monitor/start", summary="Continuously analyze a source")
+async def start_monitor(source_id: str, mode: Optional[str] = None, window: Optional[float] = None,
+                        stride: Optional[float] = None, max_in_flight: Optional[int] = None,
+                        start_threshold: Optional[float] = None, stop_threshold: Optional[float] = None,
+                        quiet_seconds: Optional[float] = None, min_seconds: Optional[float] = None,
+                        max_seconds: Optional[float] = None, pre_roll: Optional[float] = None):
+    """Analyze a source until stopped. Results are pushed as monitor_result events.
+
+    In segment mode (the default) a clip is analyzed whenever activity starts and subsides,
+    between `min_seconds` and `max_seconds` long and starting `pre_roll` seconds early.
+    In window mode the last `window` seconds are analyzed every `stride` seconds.
+    """
+    worker = get_source(source_id)
+    mode = mode or monitor_manager.defaults["mode"]
+    if mode not in MONITOR_MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(MONITOR_MODES)}")
+    window = window if window is not None else monitor_manager.defaults["window"]
+    stride = stride if stride is not None else monitor_manager.defaults["stride"]
+    if window <= 0 or stride <= 0:
+        raise HTTPException(status_code=400, detail="window and stride must be > 0")
+    if window > worker.ring.seconds:
+        raise HTTPException(status_code=400, detail=f"window can be at most {worker.ring.seconds} seconds")
+    if max_in_flight is not None and max_in_flight < 1:
+        raise HTTPException(status_code=400, detail="max_in_flight must be >= 1")
+    
+    overrides = {
+        "start_threshold": start_threshold, "stop_threshold": stop_threshold, "quiet_seconds": quiet_seconds,
+        "min_length": min_seconds, "max_length": max_seconds, "pre_roll": pre_roll
+    }
+    segment_options = dict(monitor_manager.defaults["segment_options"],
+                           **{k: v for k, v in overrides.items() if v is not None})
+    if any(value < 0 for value in segment_options.values()):
+        raise HTTPException(status_code=400, detail="Segment settings must be >= 0")
+    if segment_options["stop_threshold"] > segment_options["start_threshold"]:
+        raise HTTPException(status_code=400, detail="stop_threshold must not be above start_threshold")
+    if not segment_options["pre_roll"] < segment_options["max_length"] <= worker.ring.seconds:
+        # The whole segment, pre-roll included, has to still be in the ring buffer when it closes
+        raise HTTPException(status_code=400,
+                            detail=f"max_seconds must be above pre_roll and at most {worker.ring.seconds} seconds")
+    if segment_options["min_length"] > segment_options["max_length"]:
+        raise HTTPException(status_code=400, detail="min_seconds must not be above max_seconds")
+    
+    monitor, started = monitor_manager.start(worker, mode=mode, window=window, stride=stride,
+                                             max_in_flight=max_in_flight, segment_options=segment_options)
+    event_bus.publish(Event(MONITOR_STATUS, monitor.stats(), key=f"monitor-{source_id}"))
+    return JSONResponse(content=dict(monitor.stats(), message="Monitor started" if started else "Monitor already running"))
+
+@app.post("/sources/{source_id}/monitor/stop", summary="Stop continuous analysis of a source")
+async def stop_monitor(source_id: str):
+    monitor = monitor_manager.get(source_id)
+    if monitor is None:
+        raise HTTPException(status_code=404, detail=f"Source {source_id} is not monitored")
+    if not await monitor_manager.stop(source_id):
+        # Stopping twice is fine, the dashboard stops on every cleanup
+        return JSONResponse(content=dict(monitor.stats(), message="Monitor already stopped"))
+    event_bus.publish(Event(MONITOR_STATUS, monitor.stats(), key=f"monitor-{source_id}"))
+    return JSONResponse(content=dict(monitor.stats(), message="Monitor stopped"))
+
+@app.get("/sources/{source_id}/monitor", summary="Get the monitor status of a source")
+async def monitor_status(source_id: str):
+    monitor = monitor_manager.get(source_id)
+    if monitor is None:
+        raise HTTPException(status_code=404, detail=f"Source {source_id} is not monitored")
+    return JSONResponse(content=monitor.stats())
+
+@app.post("/capture_and_analyze", summary="Capture video clip from camera and analyze it")
+async def capture_and_analyze(wait: bool = True, pre_seconds: float = 3.0, post_seconds: float = 0.0):
+    """Capture a clip from the active camera (the default source) and analyze it for violence"""
+    worker = source_manager.get(DEFAULT_SOURCE_ID)
+    if worker is None or not worker.active:
+        raise HTTPException(status_code=400, detail="Camera streaming is not active")
+    return await capture_clip(worker, wait, pre_seconds, post_seconds)
+
+@app.get("/camera/buffer", summary="Get camera ring buffer statistics")
+async def camera_buffer_stats():
+    return JSONResponse(content=get_source(DEFAULT_SOURCE_ID, active=False).ring.stats())
+
+@app.get("/cache/stats", summary="Get analysis cache statistics")
+async def cache_stats():
+    return JSONResponse(content={
+        "responses": analysis_cache.stats(),
+        "near_duplicates": dedupe_index.stats()
+    })
+
+@app.get("/llm/stats", summary="Get upstream model client statistics")
+async def llm_stats():
+    return JSONResponse(content=llm_client.stats())
+
+@app.get("/detector/stats", summary="Get local fight detector statistics")
+async def detector_stats():
+    return JSONResponse(content=fight_detector.stats())
 
 @app.get("/video/{filename}", summary="Serve video files")
 async def serve_video(filename: str):
@@ -639,51 +990,116 @@ async def serve_video(filename: str):
     )
 
 @app.websocket("/ws")
-async def websocket_endpoint(websocket: WebSocket):
+async def websocket_endpoint(websocket: WebSocket, since: Optional[int] = None, epoch: Optional[str] = None):
+    """Clients reconnecting with `since` (the last seq they saw) and `epoch` get the events they missed"""
     print("WebSocket connection attempt")
     await manager.connect(websocket)
     print(f"WebSocket connected. Total connections: {len(manager.active_connections)}")
     
+    # Live events are queued for this connection from here on. Nothing below awaits before the
+    # missed ones are queued too, so the client sees every event exactly once and in order
+    missed = event_log.since(since, epoch) if since is not None else []
+    
     # Send a welcome message to confirm connection
     welcome_message = json.dumps({
         "type": "connection_established",
         "message": "WebSocket connected successfully",
+        "epoch": event_log.epoch,
+        "seq": event_log.seq,
         "timestamp": datetime.utcnow().isoformat()
     })
     await manager.send_personal_message(welcome_message, websocket)
+    if missed is None:
+        await manager.send_personal_message(json.dumps({
+            "type": "resync_required",
+            "reason": "server restarted" if epoch is not None and epoch != event_log.epoch else "events no longer retained",
+            "epoch": event_log.epoch,
+            "seq": event_log.seq,
+            "timestamp": datetime.utcnow().isoformat()
+        }), websocket)
+    else:
+        for message in missed:
+            await manager.send_personal_message(json.dumps(dict(message, replayed=True)), websocket)
     
     try:
         while True:
-            # Keep the connection alive by waiting for messages
+            # Keep the connection alive by waiting for messages, any message counts as a heartbeat
             data = await websocket.receive_text()
+            manager.seen(websocket)
+            if is_pong(data):
+                continue
             print(f"Received WebSocket message: {data}")
             # Echo back any messages (optional)
             await manager.send_personal_message(f"Message received: {data}", websocket)
     except WebSocketDisconnect:
         print("WebSocket disconnected")
+    except RuntimeError:
+        # Closed by the server (heartbeat timeout or a full send queue)
+        pass
+    finally:
         manager.disconnect(websocket)
         print(f"WebSocket disconnected. Remaining connections: {len(manager.active_connections)}")
 
+def is_pong(data):
+    try:
+        return json.loads(data).get("type") == "pong"
+    except (ValueError, AttributeError):
+        return False
+
+@app.get("/ws/stats", summary="Get WebSocket connection statistics")
+async def websocket_stats():
+    return JSONResponse(content=dict(manager.stats(), events=event_bus.stats(), event_log=event_log.stats()))
+
 async def startup():
     """Initialize the file observers with the current event loop"""
     global video_observer, video_event_handler, reports_observer, reports_event_handler
     
     loop = asyncio.get_event_loop()
+    source_manager.attach(loop)
+    manager.start_heartbeat()
+    event_bus.start()
     
     # Initialize video observer for stored_videos directory
     video_observer = Observer()
-    video_event_handler = StoredVideoHandler(manager, loop)
+    video_event_handler = StoredVideoHandler(event_bus, own_writes)
     video_observer.schedule(video_event_handler, stored_videos_dir, recursive=False)
+    
+    # Keep the video listings current (the observer thread also serves debug_videos)
+    # The observer starts before the scan, so files created while it runs are not missed
+    video_observer.schedule(VideoIndexHandler(stored_videos_index), stored_videos_dir, recursive=False)
+    video_observer.schedule(VideoIndexHandler(debug_videos_index), debug_videos_dir, recursive=False)
     video_observer.start()
     print("Video file observer started")
+    indexed = await asyncio.to_thread(stored_videos_index.rebuild)
+    indexed += await asyncio.to_thread(debug_videos_index.rebuild)
+    print(f"Indexed {indexed} videos")
     
     # Initialize reports observer for reports directory
     reports_observer = Observer()
-    reports_event_handler = ReportsHandler(manager, loop)
+    reports_event_handler = ReportsHandler(event_bus, own_writes)
     reports_observer.schedule(reports_event_handler, reports_dir, recursive=False)
     reports_observer.start()
     print("Reports file observer started")
     
+    # Pick up reports that were written as JSON files (older servers, manual copies)
+    imported = await asyncio.to_thread(report_store.import_json_dir, REPORTS_DIR)
+    print(f"Imported {imported} report files into the report store")
+    
+    # Load the local fight detector once, off the event loop
+    await asyncio.to_thread(fight_detector.load)
+    
+    await job_queue.start()
+    
+    # Probe the cameras once, the registry keeps them current from then on
+    healthy = await asyncio.to_thread(camera_registry.refresh)
+    print(f"Found {healthy} working cameras")
+    camera_registry.start()
+    
+    # Sources configured up front (SOURCES="lobby=rtsp://...,door=1,test=clip.mp4") start capturing right away
+    for source_id, uri in parse_sources_config(os.environ.get("SOURCES")):
+        source_manager.add(source_id, uri)
+        print(f"Source {source_id} added ({uri})")
+    
     # Note: Camera streaming will be started manually via API calls
 
 def shutdown():
@@ -691,7 +1107,8 @@ def shutdown():
     global video_observer, reports_observer
     
     # Stop camera streaming
-    stop_camera_streaming()
+    source_manager.stop_all()
+    camera_registry.stop()
     
     if video_observer:
         video_observer.stop()
@@ -709,7 +1126,12 @@ async def on_startup():
     await startup()
 
 @app.on_event("shutdown")
-def on_shutdown():
+async def on_shutdown():
+    await monitor_manager.stop_all()
+    await job_queue.stop()
+    await event_bus.stop()
+    await manager.stop()
+    await llm_client.aclose()
     shutdown()
 
 if __name__ == "__main__":
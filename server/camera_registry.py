@@ -0,0 +1,161 @@
+import glob
+import os
+import threading
+import time
+
+import cv2
+
+
+def parse_source(source):
+    """Device indices are ints, anything else (file path, URL) stays a string"""
+    if isinstance(source, int):
+        return source
+    source = str(source).strip()
+    return int(source) if source.isdigit() else source
+
+
+def is_file_source(source):
+    return isinstance(source, str) and os.path.isfile(source)
+
+
+def probe_source(source):
+    """Open a source, read one frame and report what it can do"""
+    started = time.perf_counter()
+    cap = cv2.VideoCapture(source)
+    try:
+        healthy = False
+        error = None
+        width = height = fps = None
+        if not cap.isOpened():
+            error = "could not open"
+        else:
+            ret, frame = cap.read()
+            if ret:
+                healthy = True
+                height, width = frame.shape[:2]
+                fps = cap.get(cv2.CAP_PROP_FPS) or None
+            else:
+                error = "opened but returned no frame"
+    finally:
+        cap.release()
+    return {
+        "source": source,
+        "healthy": healthy,
+        "width": width,
+        "height": height,
+        "fps": fps,
+        "error": error,
+        "probe_seconds": time.perf_counter() - started,
+        "last_probe": time.time()
+    }
+
+
+class CameraRegistry:
+    """Known capture sources with their last probe result, kept current in the background.
+
+    Sources are probed once at start, then again every `probe_interval` seconds or as soon as
+    the set of /dev/video* devices changes (checked every `hotplug_interval` seconds, which
+    is only a directory listing). Sources in use by a capture thread are not re-opened, their
+    health comes from the thread instead. Lookups never touch a device.
+    File paths can be given as sources to stand in for cameras.
+    """
+
+    def __init__(self, sources=None, probe_interval=60.0, hotplug_interval=2.0):
+        self.sources = [parse_source(s) for s in (sources if sources is not None else range(5))]
+        self.probe_interval = probe_interval
+        self.hotplug_interval = hotplug_interval
+        self._lock = threading.Lock()
+        self._cameras = {}  # source -> probe result
+        self._in_use = set()
+        self._devices = None
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self.probes = 0
+
+    def refresh(self):
+        """Probe every source that is not in use. Returns the number of healthy sources"""
+        for source in self.sources:
+            with self._lock:
+                if source in self._in_use:
+                    continue
+            result = probe_source(source)
+            with self._lock:
+                if source not in self._in_use:
+                    self._cameras[source] = result
+                self.probes += 1
+        with self._lock:
+            return sum(1 for camera in self._cameras.values() if camera["healthy"])
+
+    def start(self):
+        self._devices = self._list_devices()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def request_refresh(self):
+        self._wake.set()
+
+    @staticmethod
+    def _list_devices():
+        return sorted(glob.glob("/dev/video*"))
+
+    def _run(self):
+        next_probe = time.time() + self.probe_interval
+        while not self._stop.is_set():
+            self._wake.wait(timeout=self.hotplug_interval)
+            if self._stop.is_set():
+                break
+            devices = self._list_devices()
+            hotplug = devices != self._devices
+            if hotplug:
+                print(f"Camera devices changed: {devices}")
+                self._devices = devices
+            if hotplug or self._wake.is_set() or time.time() >= next_probe:
+                self._wake.clear()
+                try:
+                    self.refresh()
+                except Exception as e:
+                    print(f"Error probing cameras: {str(e)}")
+                next_probe = time.time() + self.probe_interval
+
+    def mark_in_use(self, source, healthy=True, width=None, height=None, fps=None):
+        """Called by a capture thread that holds the device open"""
+        with self._lock:
+            self._in_use.add(source)
+            camera = self._cameras.setdefault(source, {"source": source})
+            camera.update({"healthy": healthy, "error": None if healthy else "capture failed", "last_probe": time.time()})
+            if width:
+                camera.update({"width": width, "height": height, "fps": fps})
+
+    def release(self, source):
+        with self._lock:
+            self._in_use.discard(source)
+
+    def first_working(self):
+        """The first healthy source in configuration order, or None"""
+        with self._lock:
+            for source in self.sources:
+                camera = self._cameras.get(source)
+                if camera and camera.get("healthy"):
+                    return source
+        return None
+
+    def status(self):
+        with self._lock:
+            cameras = [
+                dict(camera, in_use=source in self._in_use)
+                for source, camera in self._cameras.items()
+            ]
+        return {
+            "cameras": cameras,
+            "healthy": sum(1 for camera in cameras if camera.get("healthy")),
+            "probes": self.probes
+        }
@@ -0,0 +1,196 @@
+import asyncio
+import itertools
+import json
+import time
+from collections import deque
+
+
+class ClientConnection:
+    """One WebSocket with its own bounded outgoing queue, drained by a dedicated writer task.
+
+    Each queued item is [message, coalesce_key, droppable, queued_at]. When the queue is full
+    the oldest droppable message is dropped. If every queued message must be delivered, the
+    queue may grow past its bound for a burst, but once the oldest of them has waited longer
+    than `send_timeout` the client is not keeping up and is closed.
+    """
+
+    def __init__(self, websocket, connection_id, max_queue=100, send_timeout=5.0):
+        self.websocket = websocket
+        self.connection_id = connection_id
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.connected_at = time.time()
+        self.last_seen = time.monotonic()
+        self._queue = deque()
+        self._ready = asyncio.Event()
+        self.closed = False
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self.writer = None
+
+    def enqueue(self, message, coalesce_key=None, droppable=True):
+        """Queue a message without waiting. Returns False if the client has to be evicted"""
+        if self.closed:
+            return True
+        if coalesce_key is not None:
+            for item in self._queue:
+                if item[1] == coalesce_key:
+                    # A newer state replaces the one still waiting to be sent
+                    item[0] = message
+                    self.coalesced += 1
+                    return True
+        if len(self._queue) >= self.max_queue:
+            for item in self._queue:
+                if item[2]:
+                    self._queue.remove(item)
+                    self.dropped += 1
+                    break
+            else:
+                if droppable:
+                    self.dropped += 1
+                    return True
+                if time.monotonic() - self._queue[0][3] > self.send_timeout:
+                    return False
+        self._queue.append([message, coalesce_key, droppable, time.monotonic()])
+        self.max_depth = max(self.max_depth, len(self._queue))
+        self._ready.set()
+        return True
+
+    async def run_writer(self, on_failure):
+        try:
+            while not self.closed:
+                if not self._queue:
+                    self._ready.clear()
+                    await self._ready.wait()
+                    continue
+                message = self._queue.popleft()[0]
+                await asyncio.wait_for(self.websocket.send_text(message), timeout=self.send_timeout)
+                self.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            await on_failure(self, f"send failed: {e!r}")
+
+    def stats(self):
+        return {
+            "connection_id": self.connection_id,
+            "connected_seconds": time.time() - self.connected_at,
+            "queue_depth": len(self._queue),
+            "max_queue_depth": self.max_depth,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "seconds_since_seen": time.monotonic() - self.last_seen
+        }
+
+
+class ConnectionManager:
+    """Fan-out of server events to every connected WebSocket.
+
+    broadcast() only appends to each connection's queue, so a slow or dead client never
+    delays the others. A heartbeat sends {"type": "ping"} every `ping_interval` seconds and
+    closes connections that have not sent anything (a pong, or any other message) for
+    `ping_timeout` seconds.
+    """
+
+    def __init__(self, max_queue=100, send_timeout=5.0, ping_interval=20.0, ping_timeout=60.0):
+        self.max_queue = max_queue
+        self.send_timeout = send_timeout
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self._connections = {}  # websocket -> ClientConnection
+        self._ids = itertools.count(1)
+        self._heartbeat = None
+        self.broadcasts = 0
+        self.evicted = 0
+        self.dropped = 0  # from connections that are gone, live ones report their own
+        self.coalesced = 0
+
+    @property
+    def active_connections(self):
+        return list(self._connections)
+
+    async def connect(self, websocket):
+        await websocket.accept()
+        connection = ClientConnection(websocket, next(self._ids), self.max_queue, self.send_timeout)
+        self._connections[websocket] = connection
+        connection.writer = asyncio.create_task(connection.run_writer(self._evict))
+        return connection
+
+    def disconnect(self, websocket):
+        connection = self._connections.pop(websocket, None)
+        if connection is None:
+            return None
+        connection.closed = True
+        self.dropped += connection.dropped
+        self.coalesced += connection.coalesced
+        if connection.writer is not None and connection.writer is not asyncio.current_task():
+            connection.writer.cancel()
+        return connection
+
+    async def _evict(self, connection, reason):
+        if connection.websocket not in self._connections:
+            return
+        print(f"Closing WebSocket {connection.connection_id}: {reason}")
+        self.evicted += 1
+        self.disconnect(connection.websocket)
+        try:
+            await asyncio.wait_for(connection.websocket.close(code=1011), timeout=1.0)
+        except Exception:
+            pass
+
+    def seen(self, websocket):
+        connection = self._connections.get(websocket)
+        if connection is not None:
+            connection.last_seen = time.monotonic()
+
+    async def send_personal_message(self, message: str, websocket):
+        connection = self._connections.get(websocket)
+        if connection is not None:
+            connection.enqueue(message, droppable=False)
+
+    async def broadcast(self, message: str, coalesce_key=None, droppable=True):
+        """Queue `message` for every connection.
+
+        Messages with the same `coalesce_key` replace each other while still queued. Messages
+        that are not `droppable` are never dropped; a client that stops draining them is
+        closed instead.
+        """
+        self.broadcasts += 1
+        for connection in list(self._connections.values()):
+            if not connection.enqueue(message, coalesce_key, droppable):
+                await self._evict(connection, "send queue full")
+
+    def start_heartbeat(self):
+        if self.ping_interval and self._heartbeat is None:
+            self._heartbeat = asyncio.create_task(self._run_heartbeat())
+
+    async def stop(self):
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        for websocket in self.active_connections:
+            self.disconnect(websocket)
+
+    async def _run_heartbeat(self):
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            now = time.monotonic()
+            for connection in list(self._connections.values()):
+                if now - connection.last_seen > self.ping_timeout:
+                    await self._evict(connection, "heartbeat timeout")
+            await self.broadcast(json.dumps({"type": "ping", "timestamp": time.time()}), coalesce_key="ping")
+
+    def stats(self):
+        connections = [connection.stats() for connection in self._connections.values()]
+        return {
+            "connections": len(connections),
+            "broadcasts": self.broadcasts,
+            "evicted": self.evicted,
+            "queued": sum(c["queue_depth"] for c in connections),
+            "dropped": self.dropped + sum(c["dropped"] for c in connections),
+            "coalesced": self.coalesced + sum(c["coalesced"] for c in connections),
+            "per_connection": connections
+        }
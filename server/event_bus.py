@@ -0,0 +1,207 @@
+import asyncio
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+
+# Event types, also the "type" of the WebSocket message each event becomes
+NEW_VIOLENT_VIDEO = "new_violent_video"
+NEW_REPORT = "new_report"
+JOB_COMPLETED = "job_completed"
+MONITOR_RESULT = "monitor_result"
+MONITOR_STATUS = "monitor_status"
+INCIDENT_UPDATED = "incident_updated"
+
+
+class Event:
+    """Something the dashboards should hear about.
+
+    `key` marks events that describe the same thing: while an event waits out the debounce
+    window, a newer event with the same key replaces it. Events without a key are delivered
+    as they come. `alert` events must reach every client, the rest may be dropped for slow ones.
+    """
+
+    def __init__(self, type, data=None, key=None, alert=False, timestamp=None):
+        self.type = type
+        self.data = data or {}
+        self.key = key
+        self.alert = alert
+        self.timestamp = timestamp or datetime.utcnow().isoformat()
+
+    def to_message(self):
+        return {"type": self.type, **self.data, "timestamp": self.timestamp}
+
+
+class EventBus:
+    """In-process async publish/subscribe for server events.
+
+    Publishers (the analysis pipeline, or watchdog threads via publish_threadsafe) hand events
+    to a dispatcher task that calls every subscriber. Keyed events are debounced: they are
+    held for `debounce` seconds of quiet (at most `max_delay`) and only the newest of a burst
+    is delivered.
+    """
+
+    def __init__(self, debounce=0.1, max_delay=1.0):
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.subscribers = []
+        self._loop = None
+        self._queue = None
+        self._task = None
+        self._pending = {}  # key -> [event, first_seen, last_seen]
+        self.published = 0
+        self.delivered = 0
+        self.coalesced = 0
+        self.counts = {}  # event type -> delivered count
+
+    def subscribe(self, handler):
+        """`handler` is an async callable taking an Event"""
+        self.subscribers.append(handler)
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._dispatch())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def publish(self, event):
+        """Publish from the event loop thread"""
+        self.published += 1
+        if self._queue is not None:
+            self._queue.put_nowait(event)
+
+    def publish_threadsafe(self, event):
+        """Publish from any other thread"""
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self.publish, event)
+
+    async def _dispatch(self):
+        while True:
+            timeout = self._next_deadline()
+            event = None
+            if timeout is None or timeout > 0:
+                try:
+                    event = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+            if event is not None:
+                if event.key is None:
+                    await self._deliver(event)
+                else:
+                    now = time.monotonic()
+                    pending = self._pending.get(event.key)
+                    if pending is None:
+                        self._pending[event.key] = [event, now, now]
+                    else:
+                        self.coalesced += 1
+                        pending[0] = event
+                        pending[2] = now
+
+            now = time.monotonic()
+            for key, (pending_event, first_seen, last_seen) in list(self._pending.items()):
+                if now - last_seen >= self.debounce or now - first_seen >= self.max_delay:
+                    del self._pending[key]
+                    await self._deliver(pending_event)
+
+    def _next_deadline(self):
+        if not self._pending:
+            return None
+        now = time.monotonic()
+        return max(0.0, min(
+            min(last_seen + self.debounce, first_seen + self.max_delay) - now
+            for _, first_seen, last_seen in self._pending.values()
+        ))
+
+    async def _deliver(self, event):
+        self.delivered += 1
+        self.counts[event.type] = self.counts.get(event.type, 0) + 1
+        for handler in self.subscribers:
+            try:
+                await handler(event)
+            except Exception as e:
+                print(f"Error in event handler for {event.type}: {str(e)}")
+
+    def stats(self):
+        return {
+            "published": self.published,
+            "delivered": self.delivered,
+            "coalesced": self.coalesced,
+            "pending": len(self._pending),
+            "delivered_by_type": dict(self.counts)
+        }
+
+
+class EventLog:
+    """The last `capacity` messages sent to clients, numbered so a client can catch up.
+
+    Sequence numbers grow by one per message. The epoch changes with every server start, so a
+    client holding a number from an earlier run knows it has to resync.
+    """
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.epoch = uuid.uuid4().hex[:12]
+        self.seq = 0
+        self._messages = deque(maxlen=capacity)
+        self.replays = 0
+        self.resyncs = 0
+
+    def append(self, message):
+        """Number a message and keep it, returns the numbered message"""
+        self.seq += 1
+        message = dict(message, seq=self.seq, epoch=self.epoch)
+        self._messages.append(message)
+        return message
+
+    def since(self, seq, epoch=None):
+        """Messages after `seq`, or None if they are no longer all available"""
+        if epoch is not None and epoch != self.epoch:
+            self.resyncs += 1
+            return None
+        if seq >= self.seq:
+            return []
+        oldest = self._messages[0]["seq"] if self._messages else self.seq + 1
+        if seq < oldest - 1 or seq < 0:
+            self.resyncs += 1
+            return None
+        self.replays += 1
+        return [message for message in self._messages if message["seq"] > seq]
+
+    def stats(self):
+        return {
+            "epoch": self.epoch,
+            "seq": self.seq,
+            "retained": len(self._messages),
+            "capacity": self.capacity,
+            "replays": self.replays,
+            "resyncs": self.resyncs
+        }
+
+
+class OwnWrites:
+    """Paths the server wrote itself, so file watchers can ignore the events they cause"""
+
+    def __init__(self, ttl=30.0):
+        self.ttl = ttl
+        self._paths = {}  # absolute path -> expiry
+        self._lock = threading.Lock()
+
+    def add(self, path):
+        with self._lock:
+            self._paths[os.path.abspath(path)] = time.monotonic() + self.ttl
+
+    def __contains__(self, path):
+        now = time.monotonic()
+        with self._lock:
+            for expired in [p for p, expiry in self._paths.items() if expiry < now]:
+                del self._paths[expired]
+            return os.path.abspath(path) in self._paths
@@ -0,0 +1,166 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import cv2
+import numpy as np
+
+# Input shape of the VGG19 + LSTM fight model from localfile-testing.ipynb
+SEQUENCE_LENGTH = 30
+FRAME_SIZE = 160
+
+
+def build_fight_model(tf, weights):
+    """Same architecture as mamon_videoFightModel2 in localfile-testing.ipynb, built for inference only"""
+    layers = tf.keras.layers
+    models = tf.keras.models
+
+    # The ImageNet weights are overwritten by load_weights, so skip downloading them
+    base_model = tf.keras.applications.vgg19.VGG19(include_top=False, weights=None, input_shape=(FRAME_SIZE, FRAME_SIZE, 3))
+
+    cnn = models.Sequential()
+    cnn.add(base_model)
+    cnn.add(layers.Flatten())
+
+    model = models.Sequential()
+    model.add(layers.TimeDistributed(cnn, input_shape=(SEQUENCE_LENGTH, FRAME_SIZE, FRAME_SIZE, 3)))
+    model.add(layers.LSTM(30, return_sequences=True))
+    model.add(layers.TimeDistributed(layers.Dense(90)))
+    model.add(layers.Dropout(0.1))
+    model.add(layers.GlobalAveragePooling1D())
+    model.add(layers.Dense(512, activation="relu"))
+    model.add(layers.Dropout(0.3))
+    model.add(layers.Dense(2, activation="sigmoid"))
+
+    model.load_weights(weights)
+    return model
+
+
+def read_first_frames(file_address, count=SEQUENCE_LENGTH):
+    """Read the first `count` consecutive frames of a clip, like video_mamonreader did"""
+    video = cv2.VideoCapture(file_address)
+    images = []
+    while len(images) < count:
+        success, image = video.read()
+        if not success:
+            break
+        images.append(image)
+    video.release()
+    return images
+
+
+def preprocess_clip(images):
+    """Turn BGR frames into one (30, 160, 160, 3) float32 array scaled to [0, 1].
+
+    Short clips are padded by repeating their last frame. The frames are resized with
+    cv2 and scaled in a single vectorized step instead of per-frame skimage.resize.
+    """
+    if not images:
+        return None
+    images = list(images[:SEQUENCE_LENGTH])
+    images += [images[-1]] * (SEQUENCE_LENGTH - len(images))
+    resized = np.stack([
+        cv2.resize(image, (FRAME_SIZE, FRAME_SIZE), interpolation=cv2.INTER_AREA)
+        for image in images
+    ])
+    return resized.astype(np.float32) * (1.0 / 255.0)
+
+
+class FightDetector:
+    """Tier-1 local detector. Loaded once, concurrent clips are micro-batched into one predict call.
+
+    predict() blocks the calling thread until the batch containing its clip has run. The worker
+    waits at most `max_wait` seconds after the first clip arrives for others to join the batch.
+    """
+
+    def __init__(self, weights, threshold=0.65, max_batch=8, max_wait=0.05):
+        self.weights = weights
+        self.threshold = threshold
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.model = None
+        self.available = False
+        self._tf = None
+        self._requests = queue.Queue()
+        self._worker = None
+        self.batches = 0
+        self.clips = 0
+        self.inference_seconds = 0.0
+
+    def load(self):
+        """Load the model and start the batching worker. Leaves the detector disabled if that is not possible"""
+        if self.available:
+            return True
+        if not os.path.exists(self.weights):
+            print(f"Fight model weights not found at {self.weights}, local detector disabled")
+            return False
+        try:
+            import tensorflow as tf
+        except ImportError:
+            print("TensorFlow is not installed, local detector disabled")
+            return False
+
+        try:
+            with tf.device("/CPU:0"):
+                self.model = build_fight_model(tf, self.weights)
+        except Exception as e:
+            # e.g. a truncated or incompatible weights file
+            print(f"Could not load fight model from {self.weights}: {e}, local detector disabled")
+            self.model = None
+            return False
+        self._tf = tf
+        self.available = True
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+        print(f"Fight model loaded from {self.weights}")
+        return True
+
+    def predict(self, clip):
+        """Return the fight probability for one preprocessed (30, 160, 160, 3) clip"""
+        future = Future()
+        self._requests.put((clip, future))
+        return future.result()
+
+    def is_fight(self, probability):
+        return probability >= self.threshold
+
+    def _run(self):
+        while True:
+            batch = [self._requests.get()]
+            deadline = time.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            clips = np.stack([clip for clip, _ in batch])
+            start = time.time()
+            try:
+                with self._tf.device("/CPU:0"):
+                    predictions = self.model.predict(clips, batch_size=len(batch), verbose=0)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.inference_seconds += time.time() - start
+            self.batches += 1
+            self.clips += len(batch)
+
+            for (_, future), prediction in zip(batch, predictions):
+                future.set_result(float(prediction[1]))
+
+    def stats(self):
+        return {
+            "available": self.available,
+            "threshold": self.threshold,
+            "clips": self.clips,
+            "batches": self.batches,
+            "mean_batch_size": self.clips / self.batches if self.batches else 0.0,
+            "inference_seconds": self.inference_seconds
+        }
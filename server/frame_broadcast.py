@@ -0,0 +1,171 @@
+import asyncio
+import itertools
+import threading
+import time
+
+import cv2
+
+MJPEG_BOUNDARY = "frame"
+DEFAULT_QUALITY = 85
+
+
+def mjpeg_part(jpeg_bytes):
+    return (b'--' + MJPEG_BOUNDARY.encode() + b'\r\n'
+            b'Content-Type: image/jpeg\r\n\r\n' + jpeg_bytes + b'\r\n')
+
+
+def encode_jpeg(frame, width=None, quality=DEFAULT_QUALITY):
+    """JPEG-encode a BGR frame, downscaled to `width` (keeping the aspect ratio) if it is wider"""
+    h, w = frame.shape[:2]
+    if width and width < w:
+        frame = cv2.resize(frame, (width, max(1, round(h * width / w))), interpolation=cv2.INTER_AREA)
+    _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return buffer.tobytes()
+
+
+class FrameBroadcaster:
+    """Shares the latest camera frame with any number of async subscribers.
+
+    The capture thread publishes raw frames into a single slot with a sequence number, and
+    only while someone is subscribed. Encoding happens on demand: each subscriber asks for
+    the frame at its own width, quality and frame-rate ceiling, and the JPEG for a given
+    (sequence number, width, quality) is produced once and shared by every subscriber that
+    asks for it. Subscribers always read the newest frame, so a slow client skips frames
+    instead of queueing them and never takes frames away from other clients.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop = None
+        self._changed = None
+        self.seq = 0
+        self.frame = None
+        self.published_at = None
+        self._viewer_ids = itertools.count(1)
+        self._viewers = {}  # viewer id -> stats dict
+        self._variants_seq = None
+        self._variants = {}  # (width, quality) -> future with the JPEG bytes of frame _variants_seq
+        self.encodes = 0
+        self.variant_hits = 0
+        self._encode_seconds = 0.0
+
+    @property
+    def has_viewers(self):
+        return bool(self._viewers)
+
+    def attach(self, loop):
+        """Bind to the event loop the subscribers run on"""
+        self._loop = loop
+        self._changed = asyncio.Event()
+
+    def publish(self, frame):
+        """Called from the capture thread with a raw BGR frame it will not modify again"""
+        with self._lock:
+            self.seq += 1
+            self.frame = frame
+            self.published_at = time.time()
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self._notify)
+
+    def _notify(self):
+        # Wake everyone waiting on the current event and start a fresh one for the next frame
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    def latest(self):
+        with self._lock:
+            return self.seq, self.frame
+
+    def _encode(self, frame, width, quality):
+        started = time.perf_counter()
+        data = encode_jpeg(frame, width, quality)
+        self._encode_seconds += time.perf_counter() - started
+        return data
+
+    async def encoded(self, seq, frame, width=None, quality=DEFAULT_QUALITY):
+        """JPEG of frame `seq` at the given settings, encoded at most once per settings"""
+        if self._variants_seq != seq:
+            # Variants of older frames are never asked for again
+            self._variants_seq = seq
+            self._variants = {}
+        key = (width, quality)
+        task = self._variants.get(key)
+        if task is not None:
+            self.variant_hits += 1
+        else:
+            # The encode is its own task, so a viewer that disconnects while it runs does not
+            # cancel it for the others waiting on the same variant
+            task = asyncio.ensure_future(asyncio.to_thread(self._encode, frame, width, quality))
+            task.add_done_callback(self._encode_done)
+            self._variants[key] = task
+        return await asyncio.shield(task)
+
+    def _encode_done(self, task):
+        if task.cancelled() or task.exception() is not None:
+            # Not cached, the next viewer asking for this variant tries again
+            for key, variant in list(self._variants.items()):
+                if variant is task:
+                    del self._variants[key]
+            return
+        self.encodes += 1
+
+    async def subscribe(self, fps=None, width=None, quality=DEFAULT_QUALITY, idle_timeout=1.0):
+        """Yield JPEG frames as they arrive, at most `fps` per second, skipping any published
+        while the caller was busy"""
+        viewer_id = next(self._viewer_ids)
+        viewer = {
+            "connected_at": time.time(), "delivered": 0, "skipped": 0, "last_seq": 0,
+            "max_fps": fps, "width": width, "quality": quality
+        }
+        self._viewers[viewer_id] = viewer
+        min_interval = 1.0 / fps if fps else 0.0
+        last_sent = 0.0
+        try:
+            while True:
+                if min_interval:
+                    wait = last_sent + min_interval - time.perf_counter()
+                    if wait > 0:
+                        await asyncio.sleep(wait)
+                seq, frame = self.latest()
+                if frame is None or seq == viewer["last_seq"]:
+                    changed = self._changed
+                    try:
+                        await asyncio.wait_for(changed.wait(), timeout=idle_timeout)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+                if viewer["last_seq"]:
+                    viewer["skipped"] += max(0, seq - viewer["last_seq"] - 1)
+                viewer["last_seq"] = seq
+                data = await self.encoded(seq, frame, width, quality)
+                viewer["delivered"] += 1
+                last_sent = time.perf_counter()
+                yield data
+        finally:
+            self._viewers.pop(viewer_id, None)
+
+    def stats(self):
+        now = time.time()
+        viewers = []
+        for viewer_id, viewer in list(self._viewers.items()):
+            elapsed = max(now - viewer["connected_at"], 1e-6)
+            viewers.append({
+                "viewer_id": viewer_id,
+                "connected_seconds": elapsed,
+                "max_fps": viewer["max_fps"],
+                "width": viewer["width"],
+                "quality": viewer["quality"],
+                "frames_delivered": viewer["delivered"],
+                "frames_skipped": viewer["skipped"],
+                "fps": viewer["delivered"] / elapsed
+            })
+        return {
+            "viewers": len(viewers),
+            "frames_published": self.seq,
+            "encodes": self.encodes,
+            "variant_hits": self.variant_hits,
+            "mean_encode_ms": 1000 * self._encode_seconds / self.encodes if self.encodes else None,
+            "last_frame_age": None if self.published_at is None else now - self.published_at,
+            "per_viewer": viewers
+        }
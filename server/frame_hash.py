@@ -0,0 +1,91 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+
+def dhash(image, hash_size=8):
+    """Difference hash of a BGR or grayscale frame as an int (64 bits for the default size)"""
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(image, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class PerceptualHashIndex:
+    """Remembers the frame hashes of recently analyzed clips per source.
+
+    A new clip is a near-duplicate of a previous one when every aligned pair of sampled
+    frames differs by at most `threshold` bits. Only clips that were actually analyzed are
+    indexed, so a verdict is never reused for longer than `max_age` seconds.
+    """
+
+    def __init__(self, threshold=5, max_age=300, history=8):
+        self.threshold = threshold
+        self.max_age = max_age
+        self.history = history
+        self._sources = {}  # source -> deque of entries, newest last
+        self._lock = threading.Lock()
+        self.matches = 0
+        self.lookups = 0
+
+    @staticmethod
+    def clip_hashes(frames):
+        """Hash a list of SampledFrame objects"""
+        return [dhash(frame.image) for frame in frames]
+
+    @staticmethod
+    def distance(hashes, other):
+        """Largest per-frame distance between two clips, compared position by position.
+
+        Clips with a different number of frames never match, a short clip must not reuse the
+        verdict of a longer one that merely starts the same way.
+        """
+        if not hashes or len(hashes) != len(other):
+            return None
+        pairs = zip(hashes, other)
+        return max(hamming(a, b) for a, b in pairs)
+
+    def find(self, source, hashes):
+        """Return the most recent matching entry for `source`, or None"""
+        now = time.time()
+        with self._lock:
+            self.lookups += 1
+            entries = self._sources.get(source)
+            if not entries:
+                return None
+            while entries and now - entries[0]["analyzed_at"] > self.max_age:
+                entries.popleft()
+            for entry in reversed(entries):
+                distance = self.distance(hashes, entry["hashes"])
+                if distance is not None and distance <= self.threshold:
+                    self.matches += 1
+                    return dict(entry, distance=distance)
+        return None
+
+    def add(self, source, hashes, analysis):
+        with self._lock:
+            entries = self._sources.setdefault(source, deque(maxlen=self.history))
+            entries.append({
+                "hashes": hashes,
+                "analysis": analysis,
+                "analyzed_at": time.time()
+            })
+
+    def stats(self):
+        with self._lock:
+            return {
+                "sources": len(self._sources),
+                "indexed_clips": sum(len(entries) for entries in self._sources.values()),
+                "lookups": self.lookups,
+                "matches": self.matches,
+                "threshold": self.threshold,
+                "max_age_seconds": self.max_age
+            }
@@ -0,0 +1,110 @@
+import math
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+class FrameRingBuffer:
+    """Fixed-size ring of the most recent camera frames, kept in one preallocated array.
+
+    The capture thread pushes every frame; readers copy a time window out of it, so a clip
+    can be cut from the last few seconds without opening the camera again. Frames larger than
+    `max_dimension` are downscaled on the way in to keep the buffer small. The array is
+    allocated on the first frame, once the frame size is known.
+    """
+
+    def __init__(self, seconds=6.0, fps=30.0, max_dimension=512):
+        self.seconds = seconds
+        self.capacity = max(1, int(math.ceil(seconds * fps)))
+        self.max_dimension = max_dimension
+        self._lock = threading.Lock()
+        self._frames = None  # (capacity, h, w, 3) uint8
+        self._timestamps = np.zeros(self.capacity, dtype=np.float64)
+        self._next = 0  # slot the next frame goes into
+        self.count = 0  # frames currently held
+        self.pushed = 0
+
+    def _fit(self, frame):
+        h, w = frame.shape[:2]
+        scale = self.max_dimension / max(h, w) if self.max_dimension else 1.0
+        if scale < 1.0:
+            frame = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+        return frame
+
+    def push(self, frame, timestamp=None):
+        frame = self._fit(frame)
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            if self._frames is None or self._frames.shape[1:] != frame.shape:
+                # First frame, or the camera changed resolution
+                self._frames = np.empty((self.capacity,) + frame.shape, dtype=np.uint8)
+                self._next = 0
+                self.count = 0
+            self._frames[self._next] = frame
+            self._timestamps[self._next] = timestamp
+            self._next = (self._next + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+            self.pushed += 1
+
+    def latest_timestamp(self):
+        with self._lock:
+            if not self.count:
+                return None
+            return float(self._timestamps[(self._next - 1) % self.capacity])
+
+    def latest(self):
+        """Copy of the newest frame and its timestamp, or (None, None)"""
+        with self._lock:
+            if not self.count:
+                return None, None
+            slot = (self._next - 1) % self.capacity
+            return self._frames[slot].copy(), float(self._timestamps[slot])
+
+    def window(self, start, end):
+        """Copy out the frames with start <= timestamp <= end, oldest first.
+
+        Returns (frames array, timestamps array); both are empty if nothing matches.
+        """
+        with self._lock:
+            if not self.count:
+                return np.empty((0,), dtype=np.uint8), np.empty((0,), dtype=np.float64)
+            # Slots in chronological order
+            order = (np.arange(self.count) + self._next - self.count) % self.capacity
+            timestamps = self._timestamps[order]
+            selected = order[(timestamps >= start) & (timestamps <= end)]
+            return self._frames[selected], self._timestamps[selected]
+
+    def stats(self):
+        with self._lock:
+            oldest = float(self._timestamps[(self._next - self.count) % self.capacity]) if self.count else None
+            newest = float(self._timestamps[(self._next - 1) % self.capacity]) if self.count else None
+            return {
+                "capacity_frames": self.capacity,
+                "frames": self.count,
+                "frames_pushed": self.pushed,
+                "seconds_buffered": newest - oldest if self.count else 0.0,
+                "frame_shape": list(self._frames.shape[1:]) if self._frames is not None else None,
+                "bytes": self._frames.nbytes if self._frames is not None else 0
+            }
+
+
+def estimate_fps(timestamps, default=30.0):
+    """Frame rate of a captured window from its timestamps"""
+    if len(timestamps) < 2 or timestamps[-1] <= timestamps[0]:
+        return default
+    return (len(timestamps) - 1) / (timestamps[-1] - timestamps[0])
+
+
+def write_clip(frames, path, fps):
+    """Encode frames (BGR) to an mp4 file and return the number of frames written"""
+    h, w = frames[0].shape[:2]
+    fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+    out = cv2.VideoWriter(path, fourcc, fps, (w, h))
+    try:
+        for frame in frames:
+            out.write(frame)
+    finally:
+        out.release()
+    return len(frames)
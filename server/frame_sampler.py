@@ -0,0 +1,151 @@
+import base64
+from functools import cached_property
+
+import cv2
+
+# Default sampling used by the analysis calls (every 25th frame, ~1 frame/sec at 30fps)
+DEFAULT_STRIDE = 25
+
+# Gaps larger than this are crossed with a seek instead of grabbing frame by frame
+SEEK_THRESHOLD = 60
+
+
+class SampledFrame:
+    """A decoded frame picked by the sampler. JPEG/base64 encoding happens on first access."""
+
+    def __init__(self, index, timestamp, image):
+        self.index = index
+        self.timestamp = timestamp
+        self.image = image
+
+    @cached_property
+    def jpeg(self):
+        _, buffer = cv2.imencode(".jpg", self.image)
+        return buffer.tobytes()
+
+    @cached_property
+    def base64(self):
+        return base64.b64encode(self.jpeg).decode("utf-8")
+
+
+class FrameSampler:
+    """Decodes only the frames that will be sent upstream.
+
+    Strategies:
+        - "stride": every `stride`-th frame (matches the old base64Frames[0::25])
+        - "count":  `count` frames spread evenly over the clip
+        - "time":   one frame every `interval` seconds
+    """
+
+    STRATEGIES = ("stride", "count", "time")
+
+    def __init__(self, strategy="stride", stride=DEFAULT_STRIDE, count=10, interval=1.0,
+                 seek_threshold=SEEK_THRESHOLD):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown sampling strategy: {strategy}")
+        self.strategy = strategy
+        self.stride = max(1, int(stride))
+        self.count = max(1, int(count))
+        self.interval = float(interval)
+        self.seek_threshold = seek_threshold
+
+    def target_indices(self, frame_count, fps):
+        """Return the sorted frame indices to decode for a clip of `frame_count` frames"""
+        if frame_count <= 0:
+            return []
+        if self.strategy == "stride":
+            return list(range(0, frame_count, self.stride))
+        if self.strategy == "count":
+            if self.count >= frame_count:
+                return list(range(frame_count))
+            step = frame_count / self.count
+            return sorted({int(i * step) for i in range(self.count)})
+        # time based
+        fps = fps if fps and fps > 0 else 30.0
+        step = max(1, int(round(self.interval * fps)))
+        return list(range(0, frame_count, step))
+
+    def sample(self, file_address):
+        """Decode the sampled frames of a video file and return them as SampledFrame objects"""
+        return self.sample_with_leading(file_address, 0)[0]
+
+    def sample_with_leading(self, file_address, leading):
+        """Like sample(), also returning the first `leading` consecutive frames (BGR arrays) from the same decode pass"""
+        video = cv2.VideoCapture(file_address)
+        if not video.isOpened():
+            video.release()
+            return [], []
+
+        fps = video.get(cv2.CAP_PROP_FPS) or 30.0
+        frame_count = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+
+        try:
+            if frame_count <= 0:
+                # Container does not report a frame count, fall back to a sequential scan
+                return self._sample_sequential(video, fps, leading)
+            indices = self.target_indices(frame_count, fps)
+            first = []
+            while len(first) < leading:
+                success, image = video.read()
+                if not success:
+                    break
+                first.append(image)
+            frames = [SampledFrame(i, i / fps, first[i]) for i in indices if i < len(first)]
+            if len(first) == leading:
+                frames += self._sample_indices(video, [i for i in indices if i >= leading], fps, position=leading)
+            return frames, first
+        finally:
+            video.release()
+
+    def sample_array(self, images, fps):
+        """Apply the same strategy to frames that are already in memory"""
+        indices = self.target_indices(len(images), fps)
+        return [SampledFrame(i, i / fps, images[i]) for i in indices]
+
+    def _sample_indices(self, video, indices, fps, position=0):
+        frames = []
+        # position is the index of the next frame the decoder will return
+        for target in indices:
+            gap = target - position
+            if gap > self.seek_threshold:
+                video.set(cv2.CAP_PROP_POS_FRAMES, target)
+                position = target
+            else:
+                # grab() demuxes without converting the frame, which is much cheaper than read()
+                while position < target:
+                    if not video.grab():
+                        return frames
+                    position += 1
+            success, image = video.read()
+            if not success:
+                break
+            position += 1
+            frames.append(SampledFrame(target, target / fps, image))
+        return frames
+
+    def _sample_sequential(self, video, fps, leading=0):
+        frames = []
+        first = []
+        index = 0
+        next_time = 0.0
+        while True:
+            if not video.grab():
+                break
+            if self.strategy == "time":
+                keep = index / fps >= next_time
+            else:
+                keep = index % self.stride == 0
+            if keep or index < leading:
+                success, image = video.retrieve()
+                if not success:
+                    break
+                if index < leading:
+                    first.append(image)
+                if keep:
+                    frames.append(SampledFrame(index, index / fps, image))
+                    next_time += self.interval
+            index += 1
+        if self.strategy == "count" and len(frames) > self.count:
+            step = len(frames) / self.count
+            frames = [frames[int(i * step)] for i in range(self.count)]
+        return frames, first
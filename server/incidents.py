@@ -0,0 +1,239 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+# Columns returned for the "summary" projection, everything except the clips and the report
+SUMMARY_FIELDS = ("incident_id", "source_id", "status", "started_at", "ended_at", "clip_count", "classification",
+                  "report_id")
+
+
+def iso(timestamp):
+    return datetime.utcfromtimestamp(timestamp).isoformat()
+
+
+class IncidentStore:
+    """Groups flagged clips from the same source into incidents, kept in SQLite.
+
+    A flagged clip that starts within `gap` seconds of the end of the source's latest incident
+    joins it, otherwise it opens a new one. An incident is "open" while a clip could still join
+    it and "closed" after that; one that has gone on for `max_duration` seconds is closed early
+    so a source that stays flagged does not grow a single record forever.
+
+    Every incident carries one consolidated report entry, built from the report of its first
+    clip and updated as clips join, so a burst produces one report instead of one per clip.
+    """
+
+    def __init__(self, db_path="reports.db", gap=10.0, max_duration=600.0):
+        self.db_path = db_path
+        self.gap = gap
+        self.max_duration = max_duration
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS incidents (
+                incident_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                source_id TEXT NOT NULL,
+                started_at REAL NOT NULL,
+                ended_at REAL NOT NULL,
+                clip_count INTEGER NOT NULL,
+                classification TEXT,
+                report_id INTEGER,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS incidents_source ON incidents (source_id, ended_at);
+            CREATE INDEX IF NOT EXISTS incidents_ended ON incidents (ended_at);
+        """)
+        self._conn.commit()
+        self.created = 0
+        self.merged = 0
+
+    def _status(self, incident, now=None):
+        now = time.time() if now is None else now
+        if now - incident["_ended_at"] > self.gap or incident["_ended_at"] - incident["_started_at"] >= self.max_duration:
+            return "closed"
+        return "open"
+
+    def _load(self, row, now=None):
+        incident = json.loads(row[0])
+        incident["status"] = self._status(incident, now)
+        return incident
+
+    @staticmethod
+    def _public(incident):
+        return {key: value for key, value in incident.items() if not key.startswith("_")}
+
+    def _latest(self, source_id):
+        row = self._conn.execute(
+            "SELECT data FROM incidents WHERE source_id = ? ORDER BY ended_at DESC LIMIT 1", (source_id,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def is_open(self, source_id, now=None):
+        """Whether a flagged clip from `source_id` starting at `now` would join an incident"""
+        with self._lock:
+            incident = self._latest(source_id)
+        return incident is not None and self._status(incident, now) == "open"
+
+    def add_clip(self, source_id, report, start, end, save_report=None):
+        """Add a flagged clip (its report entry and its start/end timestamps) to an incident.
+
+        `save_report(report)` is called with the consolidated report entry while the incident is
+        still locked, so concurrent clips of one incident save their snapshots in order.
+        Returns (incident, created); incident["report"] is the consolidated report entry.
+        """
+        clip = {
+            "filename": report.get("filename"),
+            "report_id": report.get("report_id"),
+            "start": iso(start),
+            "end": iso(end),
+            "classification": report.get("classification"),
+            "detailed_report": report.get("detailed_report", "")
+        }
+        with self._lock:
+            incident = self._latest(source_id)
+            created = (
+                incident is None
+                or start - incident["_ended_at"] > self.gap
+                or incident["_ended_at"] - incident["_started_at"] >= self.max_duration
+            )
+            if created:
+                incident = {
+                    "incident_id": None,
+                    "source_id": source_id,
+                    "_started_at": start,
+                    "_ended_at": end,
+                    "clips": [],
+                    "report": dict(report)
+                }
+            else:
+                # Clips analyzed concurrently can finish out of order
+                incident["_started_at"] = min(incident["_started_at"], start)
+                incident["_ended_at"] = max(incident["_ended_at"], end)
+            incident["clips"].append(clip)
+            self._summarize(incident, clip, created)
+
+            if created:
+                cursor = self._conn.execute(
+                    "INSERT INTO incidents (source_id, started_at, ended_at, clip_count, classification, report_id, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?, '{}')",
+                    (source_id, incident["_started_at"], incident["_ended_at"], len(incident["clips"]),
+                     incident["classification"], incident["report_id"])
+                )
+                incident["incident_id"] = cursor.lastrowid
+                incident["report"]["incident_id"] = cursor.lastrowid
+                self.created += 1
+            else:
+                self.merged += 1
+            self._conn.execute(
+                "UPDATE incidents SET started_at = ?, ended_at = ?, clip_count = ?, classification = ?, data = ? "
+                "WHERE incident_id = ?",
+                (incident["_started_at"], incident["_ended_at"], len(incident["clips"]),
+                 incident["classification"], json.dumps(incident), incident["incident_id"])
+            )
+            self._conn.commit()
+            if save_report is not None:
+                save_report(incident["report"])
+        incident["status"] = self._status(incident)
+        return self._public(incident), created
+
+    def _summarize(self, incident, clip, created):
+        """Update the incident fields and its consolidated report for a clip that just joined"""
+        counts = Counter(c["classification"] for c in incident["clips"] if c["classification"])
+        # Most frequent label, ties go to the one seen first
+        classification = max(counts, key=lambda label: (counts[label], -list(counts).index(label))) if counts else None
+        incident.update({
+            "started_at": iso(incident["_started_at"]),
+            "ended_at": iso(incident["_ended_at"]),
+            "clip_count": len(incident["clips"]),
+            "classification": classification,
+            "classifications": dict(counts),
+            "report_id": incident["report"]["report_id"]
+        })
+
+        report = incident["report"]
+        if not created and clip["detailed_report"]:
+            report["detailed_report"] = (
+                f"{report.get('detailed_report', '')}\n\n"
+                f"Update {clip['start'][11:19]}-{clip['end'][11:19]} UTC ({clip['classification']}): "
+                f"{clip['detailed_report']}"
+            ).strip()
+        report.update({
+            "classification": classification or report.get("classification"),
+            "incident_id": incident["incident_id"],
+            "source_id": incident["source_id"],
+            "incident_started_utc": incident["started_at"],
+            "incident_ended_utc": incident["ended_at"],
+            "clip_count": incident["clip_count"],
+            "clips": [c["filename"] for c in incident["clips"]],
+            "updated_timestamp_utc": datetime.utcnow().isoformat()
+        })
+        report["report"] = dict(report.get("report") or {},
+                                classification=report["classification"],
+                                detailed_report=report.get("detailed_report", ""))
+
+    def get(self, incident_id):
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM incidents WHERE incident_id = ?", (incident_id,)).fetchone()
+        return self._public(self._load(row)) if row else None
+
+    def query(self, source_id=None, status=None, before_id=None, limit=50, summary=False):
+        """Page of incidents, newest first. Returns (incidents, has_more)"""
+        conditions = []
+        params = []
+        now = time.time()
+        if source_id is not None:
+            conditions.append("source_id = ?")
+            params.append(source_id)
+        if status == "open":
+            conditions.append("ended_at >= ?")
+            params.append(now - self.gap)
+        if before_id is not None:
+            conditions.append("incident_id < ?")
+            params.append(before_id)
+
+        query = "SELECT data FROM incidents"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY incident_id DESC"
+        with self._lock:
+            rows = self._conn.execute(query, params)
+            incidents = []
+            for row in rows:
+                incident = self._load(row, now)
+                if status is not None and incident["status"] != status:
+                    # e.g. incidents closed early by max_duration
+                    continue
+                incidents.append(incident)
+                if limit is not None and len(incidents) > limit:
+                    break
+
+        has_more = limit is not None and len(incidents) > limit
+        incidents = incidents[:limit] if limit is not None else incidents
+        if summary:
+            return [{field: incident.get(field) for field in SUMMARY_FIELDS} for incident in incidents], has_more
+        return [self._public(incident) for incident in incidents], has_more
+
+    def stats(self):
+        with self._lock:
+            total = self._conn.execute("SELECT COUNT(*) FROM incidents").fetchone()[0]
+            open_count = self._conn.execute(
+                "SELECT COUNT(*) FROM incidents WHERE ended_at >= ? AND ended_at - started_at < ?",
+                (time.time() - self.gap, self.max_duration)
+            ).fetchone()[0]
+        return {
+            "incidents": total,
+            "open": open_count,
+            "gap_seconds": self.gap,
+            "max_duration_seconds": self.max_duration,
+            "created": self.created,
+            "clips_merged": self.merged
+        }
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
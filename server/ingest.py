@@ -0,0 +1,190 @@
+import asyncio
+import hashlib
+import os
+import uuid
+
+import cv2
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+
+class IngestError(Exception):
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class IngestedClip:
+    def __init__(self, path, filename, sha256, size, fields):
+        self.path = path
+        self.filename = filename
+        self.sha256 = sha256
+        self.size = size
+        self.fields = fields
+
+
+def safe_filename(filename, default="clip.mp4"):
+    """Strip any directory part a client put in the filename"""
+    filename = os.path.basename((filename or "").replace("\\", "/"))
+    return filename or default
+
+
+def probe_duration(path):
+    """Clip duration in seconds from the container metadata, None if it cannot be read"""
+    video = cv2.VideoCapture(path)
+    try:
+        fps = video.get(cv2.CAP_PROP_FPS)
+        frame_count = video.get(cv2.CAP_PROP_FRAME_COUNT)
+    finally:
+        video.release()
+    if not fps or frame_count <= 0:
+        return None
+    return frame_count / fps
+
+
+def place_file(staged_path, directory, filename):
+    """Move a staged file into its final directory with an atomic rename (same filesystem)"""
+    if not os.path.exists(directory):
+        os.makedirs(directory)
+    final_path = os.path.join(directory, filename)
+    os.replace(staged_path, final_path)
+    return final_path
+
+
+class StreamingIngest:
+    """Writes an uploaded clip straight from the request body to a staging file, exactly once.
+
+    Accepts multipart/form-data (the "file" part is the clip, other parts become fields) or a
+    raw video body. The content hash is computed and the size limit enforced while the bytes
+    arrive. The duration limit needs the container metadata, so it is checked once the
+    upload is complete, before any analysis runs.
+    """
+
+    def __init__(self, staging_dir="temp_clips", max_bytes=200 * 1024 * 1024, max_duration=120.0):
+        self.staging_dir = staging_dir
+        self.max_bytes = max_bytes
+        self.max_duration = max_duration
+
+    async def receive(self, request, default_filename="clip.mp4"):
+        if not os.path.exists(self.staging_dir):
+            os.makedirs(self.staging_dir)
+
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > self.max_bytes + 64 * 1024:
+            raise IngestError(f"Upload exceeds the {self.max_bytes} byte limit", status_code=413)
+
+        staged_path = os.path.join(self.staging_dir, f".{uuid.uuid4().hex}.part")
+        content_type, options = parse_options_header(request.headers.get("content-type", ""))
+        try:
+            if content_type == b"multipart/form-data":
+                clip = await self._receive_multipart(request, options, staged_path, default_filename)
+            else:
+                filename = safe_filename(request.query_params.get("filename"), default_filename)
+                clip = await self._receive_raw(request, staged_path, filename)
+
+            duration = await asyncio.to_thread(probe_duration, clip.path)
+            if duration is not None and duration > self.max_duration:
+                raise IngestError(f"Clip is {duration:.1f}s long, the limit is {self.max_duration}s", status_code=413)
+            return clip
+        except BaseException:
+            if os.path.exists(staged_path):
+                os.remove(staged_path)
+            raise
+
+    def _check_size(self, size):
+        if size > self.max_bytes:
+            raise IngestError(f"Upload exceeds the {self.max_bytes} byte limit", status_code=413)
+
+    async def _receive_raw(self, request, staged_path, filename):
+        digest = hashlib.sha256()
+        size = 0
+        with open(staged_path, "wb") as f:
+            async for chunk in request.stream():
+                if not chunk:
+                    continue
+                size += len(chunk)
+                self._check_size(size)
+                digest.update(chunk)
+                await asyncio.to_thread(f.write, chunk)
+        if size == 0:
+            raise IngestError("Empty upload")
+        return IngestedClip(staged_path, filename, digest.hexdigest(), size, {})
+
+    async def _receive_multipart(self, request, options, staged_path, default_filename):
+        boundary = options.get(b"boundary")
+        if not boundary:
+            raise IngestError("Missing multipart boundary")
+
+        digest = hashlib.sha256()
+        state = {"size": 0, "header_field": b"", "headers": {}, "name": None, "filename": None}
+        fields = {}
+        field_data = []
+        pending = []  # clip bytes parsed from the current network chunk, written after it
+
+        def on_part_begin():
+            state["headers"] = {}
+            state["name"] = None
+            state["filename"] = None
+            field_data.clear()
+
+        def on_header_field(data, start, end):
+            state["header_field"] += data[start:end]
+
+        def on_header_value(data, start, end):
+            field = state["header_field"].lower()
+            state["headers"][field] = state["headers"].get(field, b"") + data[start:end]
+
+        def on_header_end():
+            state["header_field"] = b""
+
+        def on_headers_finished():
+            _, disposition = parse_options_header(state["headers"].get(b"content-disposition", b""))
+            state["name"] = disposition.get(b"name", b"").decode("utf-8", "replace")
+            if b"filename" in disposition:
+                state["filename"] = disposition[b"filename"].decode("utf-8", "replace")
+
+        def on_part_data(data, start, end):
+            if state["name"] == "file":
+                state["size"] += end - start
+                self._check_size(state["size"])
+                pending.append(data[start:end])
+            else:
+                field_data.append(data[start:end])
+
+        def on_part_end():
+            if state["name"] == "file":
+                fields["__filename__"] = state["filename"]
+            elif state["name"]:
+                fields[state["name"]] = b"".join(field_data).decode("utf-8", "replace")
+
+        parser = MultipartParser(boundary, {
+            "on_part_begin": on_part_begin,
+            "on_part_data": on_part_data,
+            "on_part_end": on_part_end,
+            "on_header_field": on_header_field,
+            "on_header_value": on_header_value,
+            "on_header_end": on_header_end,
+            "on_headers_finished": on_headers_finished
+        })
+
+        with open(staged_path, "wb") as f:
+            async for chunk in request.stream():
+                if not chunk:
+                    continue
+                parser.write(chunk)
+                if pending:
+                    data = b"".join(pending)
+                    pending.clear()
+                    digest.update(data)
+                    await asyncio.to_thread(f.write, data)
+            parser.finalize()
+
+        if "__filename__" not in fields:
+            raise IngestError("Missing 'file' part in upload")
+        if state["size"] == 0:
+            raise IngestError("Empty upload")
+        filename = safe_filename(fields.pop("__filename__"), default_filename)
+        return IngestedClip(staged_path, filename, digest.hexdigest(), state["size"], fields)
@@ -0,0 +1,136 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class JobQueue:
+    """Bounded asyncio job queue drained by a fixed pool of worker tasks.
+
+    Jobs are coroutine factories. Their results (dicts) are kept in memory for `history`
+    jobs so clients can poll them, and every finished job is passed to the `on_complete`
+    callbacks. If a result carries a "timings" dict, its per-stage durations are aggregated.
+    """
+
+    def __init__(self, workers=4, max_queue=100, history=500):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.history = history
+        self.on_complete = []
+        self._queue = None
+        self._tasks = []
+        self._jobs = OrderedDict()  # job_id -> job record
+        self._futures = {}  # job_id -> future resolved with the result
+        self.busy = 0
+        self.completed = 0
+        self.failed = 0
+        self._stage_totals = {}  # stage -> [total seconds, count]
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        print(f"Job queue started with {self.workers} workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, kind, job_factory, **metadata):
+        """Queue `job_factory()` and return the job record. Raises QueueFullError when the queue is full"""
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "kind": kind,
+            "status": "queued",
+            "submitted_at": datetime.utcnow().isoformat(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None,
+            "timings": {},
+            **metadata
+        }
+        try:
+            self._queue.put_nowait((job, job_factory, time.perf_counter()))
+        except asyncio.QueueFull:
+            raise QueueFullError(f"Job queue is full ({self.max_queue} jobs waiting)")
+
+        self._jobs[job_id] = job
+        self._futures[job_id] = asyncio.get_running_loop().create_future()
+        while len(self._jobs) > self.history:
+            old_id, _ = self._jobs.popitem(last=False)
+            self._futures.pop(old_id, None)
+        return job
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    async def wait(self, job_id):
+        """Wait for a job and return its result, re-raising its error"""
+        return await asyncio.shield(self._futures[job_id])
+
+    async def _worker(self, worker_id):
+        while True:
+            job, job_factory, queued_at = await self._queue.get()
+            started = time.perf_counter()
+            job["status"] = "running"
+            job["started_at"] = datetime.utcnow().isoformat()
+            job["timings"]["queued"] = started - queued_at
+            self.busy += 1
+            future = self._futures.get(job["job_id"])
+            try:
+                result = await job_factory()
+                job["status"] = "completed"
+                job["result"] = result
+                if isinstance(result, dict):
+                    job["timings"].update(result.get("timings", {}))
+                self.completed += 1
+                if future is not None and not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                job["status"] = "failed"
+                job["error"] = str(e)
+                self.failed += 1
+                print(f"Job {job['job_id']} failed: {str(e)}")
+                if future is not None and not future.done():
+                    future.set_exception(e)
+                    # Nobody may be waiting, don't log "exception never retrieved"
+                    future.exception()
+            finally:
+                self.busy -= 1
+                job["finished_at"] = datetime.utcnow().isoformat()
+                job["timings"]["total"] = time.perf_counter() - queued_at
+                self._record_timings(job["timings"])
+                self._queue.task_done()
+
+            for callback in self.on_complete:
+                try:
+                    await callback(job)
+                except Exception as e:
+                    print(f"Error in job completion callback: {str(e)}")
+
+    def _record_timings(self, timings):
+        for stage, seconds in timings.items():
+            total = self._stage_totals.setdefault(stage, [0.0, 0])
+            total[0] += seconds
+            total[1] += 1
+
+    def stats(self):
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_queue": self.max_queue,
+            "workers": self.workers,
+            "busy_workers": self.busy,
+            "completed": self.completed,
+            "failed": self.failed,
+            "mean_stage_seconds": {
+                stage: total / count for stage, (total, count) in self._stage_totals.items() if count
+            }
+        }
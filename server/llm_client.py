@@ -0,0 +1,192 @@
+import asyncio
+import random
+
+import httpx
+
+# Status codes worth retrying: rate limits and transient server errors
+RETRYABLE_STATUS = (408, 409, 429, 500, 502, 503, 504)
+
+
+class LLMError(Exception):
+    def __init__(self, message, status_code=None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def extract_output_text(data):
+    """Collect the text parts of a Responses API result (what the SDK exposes as output_text)"""
+    if isinstance(data.get("output_text"), str):
+        return data["output_text"]
+    texts = []
+    for item in data.get("output", []):
+        for content in item.get("content") or []:
+            if content.get("type") == "output_text":
+                texts.append(content.get("text", ""))
+    return "".join(texts)
+
+
+class AsyncAnalysisClient:
+    """Async client for the Responses API.
+
+    Shares one pooled HTTP connection per event loop, caps in-flight requests with a semaphore,
+    retries rate limits and 5xx errors with exponential backoff and jitter, enforces a deadline
+    per call and can optionally hedge: if a request has not finished after `hedge_after`
+    seconds a duplicate is sent and whichever answers first wins.
+    Point `base_url` at a local stub server to test it without the real API.
+    """
+
+    def __init__(self, api_key, base_url="https://api.openai.com/v1", max_in_flight=8,
+                 max_retries=3, backoff_base=0.5, backoff_max=8.0, timeout=60.0,
+                 hedge_after=None, max_connections=20):
+        self.api_key = api_key
+        self.base_url = base_url.rstrip("/")
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.hedge_after = hedge_after
+        self.max_connections = max_connections
+
+        # The HTTP pool and semaphore belong to the loop they were created on
+        self._loop = None
+        self._http = None
+        self._semaphore = None
+
+        self.in_flight = 0
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    def _ensure_loop_state(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            if self._http is not None:
+                self._discard(self._http, self._loop)
+            self._loop = loop
+            self._http = httpx.AsyncClient(
+                base_url=self.base_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                )
+            )
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+
+    def _discard(self, http, loop):
+        """Close a client left over from another event loop, on that loop if it still runs"""
+        if loop is not None and loop.is_running() and not loop.is_closed():
+            asyncio.run_coroutine_threadsafe(http.aclose(), loop)
+            return
+        # Its loop is gone and its connections with it, closing only releases the pool
+        task = asyncio.ensure_future(http.aclose())
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+
+    async def create_response(self, payload, deadline=None):
+        """POST /responses and return the output text. `deadline` is in seconds for the whole call"""
+        if not self.api_key:
+            raise LLMError("No API key configured, set OPENAI_API_KEY")
+        self._ensure_loop_state()
+        deadline = self.timeout if deadline is None else deadline
+        try:
+            return await asyncio.wait_for(self._call(payload), timeout=deadline)
+        except asyncio.TimeoutError:
+            self.failures += 1
+            raise LLMError(f"Model call exceeded its {deadline}s deadline")
+        except LLMError:
+            self.failures += 1
+            raise
+
+    async def _call(self, payload):
+        if not self.hedge_after:
+            return await self._post_with_retries(payload)
+
+        primary = asyncio.ensure_future(self._post_with_retries(payload))
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=self.hedge_after)
+        except asyncio.CancelledError:
+            primary.cancel()
+            raise
+        if done:
+            return primary.result()
+
+        self.hedges += 1
+        hedge = asyncio.ensure_future(self._post_with_retries(payload))
+        pending = {primary, hedge}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedge:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # Also runs when the deadline cancels us
+            for task in (primary, hedge):
+                if not task.done():
+                    task.cancel()
+
+    async def _post_with_retries(self, payload):
+        attempt = 0
+        while True:
+            try:
+                return await self._post(payload)
+            except LLMError as e:
+                retryable = e.status_code is None or e.status_code in RETRYABLE_STATUS
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                delay = getattr(e, "retry_after", None)
+                if delay is None:
+                    delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+                    delay = delay / 2 + random.uniform(0, delay / 2)
+                attempt += 1
+                self.retries += 1
+                print(f"Model call failed ({e}), retry {attempt}/{self.max_retries} in {delay:.2f}s")
+                await asyncio.sleep(delay)
+
+    async def _post(self, payload):
+        async with self._semaphore:
+            self.in_flight += 1
+            self.requests += 1
+            try:
+                response = await self._http.post("/responses", json=payload)
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                raise LLMError(f"Connection error: {e}")
+            finally:
+                self.in_flight -= 1
+
+        if response.status_code != 200:
+            error = LLMError(f"Model call returned {response.status_code}: {response.text[:200]}", response.status_code)
+            retry_after = response.headers.get("retry-after")
+            if retry_after:
+                try:
+                    error.retry_after = min(self.backoff_max, float(retry_after))
+                except ValueError:
+                    pass
+            raise error
+        return extract_output_text(response.json())
+
+    async def aclose(self):
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+            self._loop = None
+
+    def stats(self):
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins
+        }
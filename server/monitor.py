@@ -0,0 +1,210 @@
+import asyncio
+import time
+
+from segmenter import ClipSegmenter
+
+MODES = ("segment", "window")
+
+
+class SourceMonitor:
+    """Analyzes a source continuously.
+
+    In "segment" mode the newest ring buffer frame is sampled every `sample_interval` seconds
+    and fed to a ClipSegmenter (built from `segment_options`); every clip it closes, pre-roll
+    included, is handed to `analyze(worker, start, end)`, so an incident is analyzed once as a
+    whole and quiet stretches are not analyzed at all. Segments are never skipped.
+
+    In "window" mode the last `window` seconds are analyzed every `stride` seconds, so
+    consecutive windows overlap by window - stride seconds and nothing falls between clips. At
+    most `max_in_flight` windows are analyzed at once; a window that comes due while they are
+    all busy is skipped rather than queued, so a slow model never builds up a backlog.
+
+    `on_result(monitor, window, result, error)` is called for every analyzed clip.
+    """
+
+    def __init__(self, worker, analyze, on_result=None, mode="segment", window=3.0, stride=2.0, max_in_flight=2,
+                 sample_interval=0.1, segment_options=None):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        self.worker = worker
+        self.analyze = analyze
+        self.on_result = on_result
+        self.mode = mode
+        self.window = window
+        self.stride = stride
+        self.max_in_flight = max_in_flight
+        self.sample_interval = sample_interval
+        self.segmenter = ClipSegmenter(**(segment_options or {})) if mode == "segment" else None
+        self._task = None
+        self._in_flight = set()
+        self.started_at = None
+        self.windows = 0
+        self.analyzed = 0
+        self.flagged = 0
+        self.failed = 0
+        self.skipped_busy = 0
+        self.skipped_unavailable = 0
+        self.last_result = None
+
+    @property
+    def source_id(self):
+        return self.worker.source_id
+
+    @property
+    def running(self):
+        return self._task is not None and not self._task.done()
+
+    def start(self):
+        if self.running:
+            return False
+        self.started_at = time.time()
+        self._task = asyncio.create_task(self._run_segments() if self.mode == "segment" else self._run())
+        return True
+
+    async def stop(self, flush=True):
+        if self._task is None:
+            return False
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        if flush and self.segmenter is not None:
+            # An incident still going on when the monitor stops is analyzed up to now
+            for segment in self.segmenter.flush(time.time()):
+                self._schedule_segment(segment)
+        # Windows already being analyzed finish, their results are still reported
+        return True
+
+    async def cancel_in_flight(self):
+        """Cancel the clips still being analyzed and wait for them to finish"""
+        tasks = list(self._in_flight)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _run_segments(self):
+        last_timestamp = None
+        while True:
+            await asyncio.sleep(self.sample_interval)
+            if self.worker.state != "streaming":
+                # Whatever was recorded before the source went away is still in the ring buffer
+                for segment in self.segmenter.flush(last_timestamp or time.time()):
+                    self._schedule_segment(segment)
+                self.segmenter.reset()
+                continue
+            frame, timestamp = self.worker.ring.latest()
+            if frame is None or timestamp == last_timestamp:
+                continue
+            last_timestamp = timestamp
+            for segment in self.segmenter.update_frame(frame, timestamp):
+                self._schedule_segment(segment)
+
+    def _schedule_segment(self, segment):
+        self.windows += 1
+        task = asyncio.create_task(self._analyze_window(segment["start"], segment["end"], segment))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _run(self):
+        # The first window needs a full window of frames
+        await asyncio.sleep(self.window)
+        next_at = time.monotonic()
+        while True:
+            end = time.time()
+            self._schedule(end - self.window, end)
+            next_at += self.stride
+            await asyncio.sleep(max(0.0, next_at - time.monotonic()))
+
+    def _schedule(self, start, end):
+        self.windows += 1
+        if self.worker.state != "streaming":
+            self.skipped_unavailable += 1
+            return
+        if len(self._in_flight) >= self.max_in_flight:
+            self.skipped_busy += 1
+            return
+        task = asyncio.create_task(self._analyze_window(start, end))
+        self._in_flight.add(task)
+        task.add_done_callback(self._in_flight.discard)
+
+    async def _analyze_window(self, start, end, segment=None):
+        window = dict(segment or {}, start=start, end=end)
+        result = error = None
+        try:
+            result = await self.analyze(self.worker, start, end)
+            self.analyzed += 1
+            if result.get("violence_detected"):
+                self.flagged += 1
+            self.last_result = {
+                "window": window,
+                "violence_detected": result.get("violence_detected"),
+                "classification": result.get("classification"),
+                "filename": result.get("filename")
+            }
+        except Exception as e:
+            self.failed += 1
+            error = str(e)
+            print(f"Monitor {self.source_id}: window analysis failed: {error}")
+        if self.on_result is not None:
+            try:
+                await self.on_result(self, window, result, error)
+            except Exception as e:
+                print(f"Error in monitor result callback: {str(e)}")
+
+    def stats(self):
+        return {
+            "source_id": self.source_id,
+            "running": self.running,
+            "mode": self.mode,
+            "window_seconds": self.window if self.mode == "window" else None,
+            "stride_seconds": self.stride if self.mode == "window" else None,
+            "max_in_flight": self.max_in_flight if self.mode == "window" else None,
+            "segmenter": self.segmenter.stats() if self.segmenter is not None else None,
+            "in_flight": len(self._in_flight),
+            "uptime_seconds": time.time() - self.started_at if self.running else 0.0,
+            "windows": self.windows,
+            "analyzed": self.analyzed,
+            "flagged": self.flagged,
+            "failed": self.failed,
+            "skipped_busy": self.skipped_busy,
+            "skipped_unavailable": self.skipped_unavailable,
+            "last_result": self.last_result
+        }
+
+
+class MonitorManager:
+    """One SourceMonitor per source id"""
+
+    def __init__(self, analyze, on_result=None, **defaults):
+        self.analyze = analyze
+        self.on_result = on_result
+        self.defaults = defaults
+        self._monitors = {}
+
+    def get(self, source_id):
+        return self._monitors.get(source_id)
+
+    def start(self, worker, **options):
+        """Start monitoring `worker`, returns (monitor, started). A running monitor is left as is"""
+        monitor = self._monitors.get(worker.source_id)
+        if monitor is not None and monitor.running:
+            return monitor, False
+        settings = dict(self.defaults, **{k: v for k, v in options.items() if v is not None})
+        monitor = SourceMonitor(worker, self.analyze, self.on_result, **settings)
+        self._monitors[worker.source_id] = monitor
+        monitor.start()
+        return monitor, True
+
+    async def stop(self, source_id):
+        monitor = self._monitors.get(source_id)
+        if monitor is None:
+            return False
+        return await monitor.stop()
+
+    async def stop_all(self):
+        # On shutdown nothing may be left waiting on the job queue that stops next
+        for monitor in list(self._monitors.values()):
+            await monitor.stop(flush=False)
+            await monitor.cancel_in_flight()
+
+    def stats(self):
+        return {"monitors": [monitor.stats() for monitor in self._monitors.values()]}
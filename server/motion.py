@@ -0,0 +1,54 @@
+import cv2
+import numpy as np
+
+# Frames are compared at this size, enough to see people moving and cheap to difference
+MOTION_SIZE = (160, 120)
+
+# Per-pixel intensity change (0-255) that counts as "changed" rather than sensor noise
+PIXEL_THRESHOLD = 25
+
+
+def _grayscale_stack(images, size=MOTION_SIZE):
+    return np.stack([
+        cv2.resize(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY) if image.ndim == 3 else image,
+                   size, interpolation=cv2.INTER_AREA)
+        for image in images
+    ])
+
+
+def motion_gray(image, size=MOTION_SIZE):
+    """One frame reduced to the small grayscale image the motion measures compare"""
+    return _grayscale_stack([image], size)[0]
+
+
+def changed_fraction(previous, current, pixel_threshold=PIXEL_THRESHOLD):
+    """Fraction of pixels that changed between two motion_gray() images"""
+    return float((np.abs(current.astype(np.int16) - previous) > pixel_threshold).mean())
+
+
+def frame_difference_score(images, size=MOTION_SIZE, pixel_threshold=PIXEL_THRESHOLD):
+    """Largest fraction of pixels that changed between consecutive frames (0.0 - 1.0)"""
+    if len(images) < 2:
+        return None
+    stack = _grayscale_stack(images, size).astype(np.int16)
+    changed = np.abs(np.diff(stack, axis=0)) > pixel_threshold
+    return float(changed.mean(axis=(1, 2)).max())
+
+
+def optical_flow_score(images, size=MOTION_SIZE):
+    """Largest mean optical-flow magnitude (pixels at `size`) between consecutive frames"""
+    if len(images) < 2:
+        return None
+    stack = _grayscale_stack(images, size)
+    magnitudes = []
+    for previous, current in zip(stack[:-1], stack[1:]):
+        flow = cv2.calcOpticalFlowFarneback(previous, current, None, 0.5, 3, 15, 3, 5, 1.2, 0)
+        magnitudes.append(float(np.linalg.norm(flow, axis=2).mean()))
+    return max(magnitudes)
+
+
+def motion_score(images, method="diff"):
+    """Motion energy of a clip from its sampled frames, None if there is nothing to compare"""
+    if method == "flow":
+        return optical_flow_score(images)
+    return frame_difference_score(images)
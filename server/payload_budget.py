@@ -0,0 +1,81 @@
+import base64
+
+import cv2
+
+
+class PayloadBudget:
+    """Caps the images sent to the model in one call.
+
+    At most `max_images` frames (spread evenly over the sampled ones) are sent, each no larger
+    than `max_dimension` on its longest side. JPEG quality is lowered step by step, and the
+    frames are shrunk further once quality bottoms out, until the base64 payload fits in
+    `max_total_bytes`.
+    """
+
+    def __init__(self, max_images=10, max_dimension=512, max_total_bytes=600_000,
+                 start_quality=85, min_quality=40, quality_step=10, shrink_factor=0.75,
+                 min_dimension=160):
+        self.max_images = max_images
+        self.max_dimension = max_dimension
+        self.max_total_bytes = max_total_bytes
+        self.start_quality = start_quality
+        self.min_quality = min_quality
+        self.quality_step = quality_step
+        self.shrink_factor = shrink_factor
+        self.min_dimension = min_dimension
+
+    def select(self, frames):
+        if len(frames) <= self.max_images:
+            return list(frames)
+        step = len(frames) / self.max_images
+        return [frames[int(i * step)] for i in range(self.max_images)]
+
+    @staticmethod
+    def _resize(image, dimension):
+        height, width = image.shape[:2]
+        scale = dimension / max(height, width)
+        if scale >= 1:
+            return image
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+    @staticmethod
+    def _encode(images, quality):
+        encoded = []
+        for image in images:
+            _, buffer = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            encoded.append(base64.b64encode(buffer).decode("utf-8"))
+        return encoded
+
+    def fit(self, frames):
+        """Encode SampledFrame objects within the budget.
+
+        Returns (base64 strings, info) where info records the settings used and the payload size.
+        """
+        selected = self.select(frames)
+        if not selected:
+            return [], {"images": 0, "bytes": 0, "quality": None, "dimension": None}
+
+        dimension = min(self.max_dimension, max(max(frame.image.shape[:2]) for frame in selected))
+        while True:
+            images = [self._resize(frame.image, dimension) for frame in selected]
+            quality = self.start_quality
+            while True:
+                encoded = self._encode(images, quality)
+                total = sum(len(frame) for frame in encoded)
+                if total <= self.max_total_bytes or quality <= self.min_quality:
+                    break
+                quality = max(self.min_quality, quality - self.quality_step)
+
+            smaller = int(dimension * self.shrink_factor)
+            if total <= self.max_total_bytes or smaller < self.min_dimension:
+                break
+            dimension = smaller
+
+        return encoded, {
+            "images": len(encoded),
+            "bytes": total,
+            "quality": quality,
+            "dimension": dimension,
+            "within_budget": total <= self.max_total_bytes
+        }
@@ -0,0 +1,218 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+# Columns returned for the "summary" projection, everything except the report text
+SUMMARY_COLUMNS = ("report_id", "filename", "timestamp", "classification", "violence_detected")
+
+
+class ReportStore:
+    """SQLite-backed report store, indexed on report_id, timestamp, classification and violence flag.
+
+    The full report entry is kept as JSON next to the indexed columns, so entries round-trip
+    unchanged. Existing per-report JSON files can be imported with import_json_dir().
+    """
+
+    def __init__(self, db_path="reports.db"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS reports (
+                report_id INTEGER PRIMARY KEY,
+                filename TEXT,
+                timestamp TEXT,
+                classification TEXT,
+                violence_detected INTEGER NOT NULL DEFAULT 0,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS reports_timestamp ON reports (timestamp);
+            -- Databases from before case-insensitive filtering have a plain index under the old name
+            DROP INDEX IF EXISTS reports_classification;
+            CREATE INDEX IF NOT EXISTS reports_classification_nocase ON reports (classification COLLATE NOCASE);
+            CREATE INDEX IF NOT EXISTS reports_violence ON reports (violence_detected, report_id);
+            CREATE TABLE IF NOT EXISTS store_meta (key TEXT PRIMARY KEY, value TEXT);
+        """)
+        self._conn.commit()
+        # Changes with every write, together with the per-process generation it identifies a snapshot
+        self.generation = uuid.uuid4().hex[:12]
+        self.changes = 0
+        self._last_id = None  # highest report_id handed out, read from the table on first use
+
+    @property
+    def version(self):
+        return f"{self.generation}-{self.changes}"
+
+    @staticmethod
+    def _row(report):
+        return (
+            int(report["report_id"]),
+            report.get("filename"),
+            report.get("analysis_timestamp_utc"),
+            report.get("classification"),
+            1 if report.get("violence_detected") else 0,
+            json.dumps(report)
+        )
+
+    def _next_id(self):
+        # Millisecond timestamps as before, bumped past the last id so two reports created in
+        # the same millisecond never share one. Called with the lock held
+        if self._last_id is None:
+            self._last_id = self._conn.execute("SELECT COALESCE(MAX(report_id), 0) FROM reports").fetchone()[0]
+        self._last_id = max(int(time.time() * 1000), self._last_id + 1)
+        return self._last_id
+
+    def new_id(self):
+        """A report_id no other report has"""
+        with self._lock:
+            return self._next_id()
+
+    def add(self, report, replace=False):
+        """Insert a report entry. With `replace` an entry with the same report_id is overwritten
+        (incident reports are updated that way), otherwise a clashing report gets a new id"""
+        with self._lock:
+            if replace:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO reports (report_id, filename, timestamp, classification, violence_detected, data) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    self._row(report)
+                )
+            else:
+                while True:
+                    try:
+                        self._conn.execute(
+                            "INSERT INTO reports (report_id, filename, timestamp, classification, violence_detected, data) "
+                            "VALUES (?, ?, ?, ?, ?, ?)",
+                            self._row(report)
+                        )
+                        break
+                    except sqlite3.IntegrityError:
+                        report["report_id"] = self._next_id()
+            self._conn.commit()
+            self.changes += 1
+
+    def get(self, report_id):
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM reports WHERE report_id = ?", (report_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete(self, report_id):
+        """Delete a report and return it, or None if it does not exist"""
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM reports WHERE report_id = ?", (report_id,)).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("DELETE FROM reports WHERE report_id = ?", (report_id,))
+            self._conn.commit()
+            self.changes += 1
+        return json.loads(row[0])
+
+    def query(self, violence_detected=None, classification=None, since=None, until=None,
+              before_id=None, limit=50, summary=False):
+        """Filtered page of reports, newest report_id first.
+
+        Pagination is keyset based: pass the last report_id of a page as `before_id` to get the
+        next one. `since`/`until` compare against the ISO analysis timestamp. Returns
+        (reports, has_more).
+        """
+        conditions = []
+        params = []
+        if violence_detected is not None:
+            conditions.append("violence_detected = ?")
+            params.append(1 if violence_detected else 0)
+        if classification is not None:
+            conditions.append("classification = ? COLLATE NOCASE")
+            params.append(classification)
+        if since is not None:
+            conditions.append("timestamp >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("timestamp < ?")
+            params.append(until)
+        if before_id is not None:
+            conditions.append("report_id < ?")
+            params.append(before_id)
+
+        columns = ", ".join(SUMMARY_COLUMNS) if summary else "data"
+        query = f"SELECT {columns} FROM reports"
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY report_id DESC"
+        if limit is not None:
+            # One extra row tells us whether there is another page
+            query += " LIMIT ?"
+            params.append(limit + 1)
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        has_more = limit is not None and len(rows) > limit
+        rows = rows[:limit] if limit is not None else rows
+        if summary:
+            reports = [{
+                "report_id": row[0],
+                "filename": row[1],
+                "analysis_timestamp_utc": row[2],
+                "classification": row[3],
+                "violence_detected": bool(row[4])
+            } for row in rows]
+        else:
+            reports = [json.loads(row[0]) for row in rows]
+        return reports, has_more
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM reports").fetchone()[0]
+
+    def import_json_dir(self, directory):
+        """Import the report JSON files in `directory` that changed since the last import.
+
+        The newest modification time imported is kept in the database, so a restart only reads
+        files written or copied in since then. Reports already in the store are kept.
+        """
+        if not os.path.exists(directory):
+            return 0
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM store_meta WHERE key = 'json_imported_mtime'").fetchone()
+        imported_mtime = float(row[0]) if row else 0.0
+        newest = imported_mtime
+        rows = []
+        for filename in os.listdir(directory):
+            if not filename.endswith('.json'):
+                continue
+            path = os.path.join(directory, filename)
+            try:
+                mtime = os.path.getmtime(path)
+                if mtime <= imported_mtime:
+                    continue
+                with open(path, 'r') as f:
+                    report = json.load(f)
+                rows.append(self._row(report))
+                newest = max(newest, mtime)
+            except (json.JSONDecodeError, FileNotFoundError, KeyError, TypeError, ValueError) as e:
+                print(f"Error importing report {filename}: {str(e)}")
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO reports (report_id, filename, timestamp, classification, violence_detected, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            imported = self._conn.total_changes - before
+            self._last_id = None  # imported ids may be higher
+            self._conn.execute(
+                "INSERT OR REPLACE INTO store_meta (key, value) VALUES ('json_imported_mtime', ?)", (repr(newest),)
+            )
+            self._conn.commit()
+            if imported:
+                self.changes += 1
+            return imported
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
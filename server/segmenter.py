@@ -0,0 +1,107 @@
+from motion import motion_gray, changed_fraction
+
+
+class ClipSegmenter:
+    """Turns a stream of frames into clips that follow activity instead of a fixed clock.
+
+    A clip opens once the changed-pixel fraction between consecutive samples stays at or above
+    `start_threshold` for `start_samples` samples, and starts `pre_roll` seconds before that so
+    the lead-up is included. It closes after the activity has stayed below `stop_threshold`
+    for `quiet_seconds` (the two thresholds give hysteresis), but never before `min_length`
+    seconds. A clip reaching `max_length` is closed and, if the activity goes on, the next one
+    starts right where it ended.
+
+    update() returns the clips that closed as dicts with start/end timestamps, the reason it
+    closed and the peak activity. Times are whatever clock the caller passes in.
+    """
+
+    def __init__(self, start_threshold=0.02, stop_threshold=0.01, start_samples=2, quiet_seconds=1.0,
+                 min_length=1.0, max_length=5.0, pre_roll=1.0):
+        if stop_threshold > start_threshold:
+            raise ValueError("stop_threshold must not be above start_threshold")
+        self.start_threshold = start_threshold
+        self.stop_threshold = stop_threshold
+        self.start_samples = start_samples
+        self.quiet_seconds = quiet_seconds
+        self.min_length = min_length
+        self.max_length = max_length
+        self.pre_roll = pre_roll
+        self._previous = None
+        self._above = 0
+        self._segment = None  # the open clip
+        self.score = None
+        self.segments = 0
+
+    @property
+    def active(self):
+        return self._segment is not None
+
+    def update_frame(self, frame, timestamp):
+        """Feed a frame, returns the clips that closed"""
+        gray = motion_gray(frame)
+        previous, self._previous = self._previous, gray
+        if previous is None:
+            return []
+        return self.update(changed_fraction(previous, gray), timestamp)
+
+    def update(self, score, timestamp):
+        """Feed an activity score, returns the clips that closed"""
+        self.score = score
+        closed = []
+        segment = self._segment
+
+        if segment is None:
+            self._above = self._above + 1 if score >= self.start_threshold else 0
+            if self._above >= self.start_samples:
+                self._open(timestamp - self.pre_roll, timestamp, score)
+            return closed
+
+        segment["peak_score"] = max(segment["peak_score"], score)
+        if score >= self.stop_threshold:
+            segment["last_active"] = timestamp
+
+        if timestamp - segment["start"] >= self.max_length:
+            end = segment["start"] + self.max_length
+            closed.append(self._close(end, "max_length"))
+            if timestamp - segment["last_active"] < self.quiet_seconds:
+                # Still going on, carry on in a new clip without another pre-roll
+                self._open(end, end, score)
+        elif (timestamp - segment["last_active"] >= self.quiet_seconds
+              and timestamp - segment["start"] >= self.min_length):
+            closed.append(self._close(timestamp, "quiet"))
+        return closed
+
+    def flush(self, timestamp):
+        """Close the open clip, if any (e.g. when the source stops)"""
+        if self._segment is None:
+            return []
+        return [self._close(max(timestamp, self._segment["start"]), "flushed")]
+
+    def reset(self):
+        """Forget the previous frame, e.g. after the source reconnected, so it is not compared to the next one"""
+        self._previous = None
+        self._above = 0
+
+    def _open(self, start, trigger, score):
+        self._segment = {"start": start, "trigger": trigger, "last_active": trigger, "peak_score": score}
+        self._above = 0
+
+    def _close(self, end, reason):
+        segment = self._segment
+        self._segment = None
+        self.segments += 1
+        return {
+            "start": segment["start"],
+            "end": end,
+            "trigger": segment["trigger"],
+            "reason": reason,
+            "peak_score": segment["peak_score"]
+        }
+
+    def stats(self):
+        return {
+            "active": self.active,
+            "score": self.score,
+            "segments": self.segments,
+            "open_since": self._segment["start"] if self._segment else None
+        }
@@ -0,0 +1,255 @@
+import random
+import threading
+import time
+
+import cv2
+
+from camera_registry import parse_source, is_file_source
+from frame_broadcast import FrameBroadcaster
+from frame_ring import FrameRingBuffer
+
+DEFAULT_SOURCE_ID = "default"
+
+
+def source_kind(uri):
+    if isinstance(uri, int):
+        return "local"
+    if is_file_source(uri):
+        return "file"
+    if "://" in uri:
+        return uri.split("://", 1)[0].lower()  # rtsp, http, ...
+    return "local"
+
+
+class CaptureWorker:
+    """Captures one source on its own thread into its own ring buffer and broadcaster.
+
+    Local devices are opened at the requested resolution, network streams reconnect with
+    exponential backoff (with jitter) when they fail, and video files loop at their own frame
+    rate to stand in for live cameras. OpenCV releases the GIL while it reads, decodes,
+    resizes and encodes, so one thread per source spreads across cores. Frames are handed to
+    the broadcaster raw and only while someone watches, encoding is up to the viewers.
+    """
+
+    def __init__(self, source_id, uri, width=640, height=480, fps=30.0,
+                 buffer_seconds=6.0, buffer_max_dimension=512, reconnect_base=1.0,
+                 reconnect_max=30.0, max_read_failures=30, registry=None):
+        self.source_id = source_id
+        self.uri = parse_source(uri)
+        self.kind = source_kind(self.uri)
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.reconnect_base = reconnect_base
+        self.reconnect_max = reconnect_max
+        self.max_read_failures = max_read_failures
+        self.registry = registry
+        self.ring = FrameRingBuffer(seconds=buffer_seconds, fps=fps, max_dimension=buffer_max_dimension)
+        self.broadcaster = FrameBroadcaster()
+
+        self._stop = threading.Event()
+        self._thread = None
+        self.state = "stopped"
+        self.started_at = None
+        self.frames = 0
+        self.read_failures = 0
+        self.reconnects = 0
+        self.last_error = None
+        self.last_frame_at = None
+        self.frame_shape = None
+        self._capture_fps = 0.0
+
+    @property
+    def active(self):
+        return self._thread is not None and self._thread.is_alive() and not self._stop.is_set()
+
+    def start(self, loop):
+        if self.active:
+            return False
+        self.broadcaster.attach(loop)
+        self._stop.clear()
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name=f"capture-{self.source_id}", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self, timeout=5):
+        if self._thread is None:
+            return False
+        self._stop.set()
+        self._thread.join(timeout=timeout)
+        self._thread = None
+        self.state = "stopped"
+        return True
+
+    def _open(self):
+        cap = cv2.VideoCapture(self.uri)
+        if self.kind == "local":
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+            cap.set(cv2.CAP_PROP_FPS, self.fps)
+        if not cap.isOpened():
+            cap.release()
+            return None
+        return cap
+
+    def _backoff(self, attempt):
+        delay = min(self.reconnect_max, self.reconnect_base * (2 ** attempt))
+        delay = delay / 2 + random.uniform(0, delay / 2)
+        self.state = "backoff"
+        self._stop.wait(delay)
+
+    def _run(self):
+        attempt = 0
+        while not self._stop.is_set():
+            self.state = "connecting"
+            cap = self._open()
+            if cap is None:
+                self.last_error = f"Could not open {self.uri}"
+                print(f"Source {self.source_id}: {self.last_error}, retrying")
+                self._backoff(attempt)
+                attempt += 1
+                continue
+
+            if attempt:
+                self.reconnects += 1
+            attempt = 0
+            if self.registry is not None and self.kind == "local":
+                self.registry.mark_in_use(
+                    self.uri,
+                    width=int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                    height=int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+                    fps=cap.get(cv2.CAP_PROP_FPS) or None
+                )
+            print(f"Source {self.source_id} streaming from {self.uri}")
+            try:
+                self._capture(cap)
+            finally:
+                cap.release()
+                if self.registry is not None and self.kind == "local":
+                    self.registry.release(self.uri)
+            if not self._stop.is_set():
+                print(f"Source {self.source_id} lost ({self.last_error}), reconnecting")
+                self._backoff(attempt)
+                attempt += 1
+        self.state = "stopped"
+        print(f"Source {self.source_id} stopped")
+
+    def _capture(self, cap):
+        self.state = "streaming"
+        # Files are read as fast as they decode, pace them like a live camera
+        frame_interval = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or self.fps) if self.kind == "file" else 0.0
+        failures = 0
+        next_frame_at = time.perf_counter()
+        while not self._stop.is_set():
+            ret, frame = cap.read()
+            if not ret:
+                # A file that keeps failing right after rewinding is broken, not at its end
+                failures += 1
+                self.read_failures += 1
+                if failures >= self.max_read_failures:
+                    self.last_error = f"{failures} consecutive read failures"
+                    if self.registry is not None and self.kind == "local":
+                        self.registry.mark_in_use(self.uri, healthy=False)
+                    return
+                if self.kind == "file":
+                    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                continue
+            failures = 0
+            self._on_frame(frame)
+            if frame_interval:
+                next_frame_at = max(next_frame_at + frame_interval, time.perf_counter() - frame_interval)
+                self._stop.wait(max(0.0, next_frame_at - time.perf_counter()))
+
+    def _on_frame(self, frame):
+        now = time.time()
+        if self.last_frame_at is not None and now > self.last_frame_at:
+            # Exponential moving average of the capture rate
+            self._capture_fps = 0.9 * self._capture_fps + 0.1 / (now - self.last_frame_at)
+        self.last_frame_at = now
+        self.frames += 1
+        self.frame_shape = frame.shape[:2]
+        self.ring.push(frame, now)
+        # Frames are only encoded when (and at the settings) a viewer asks for them
+        if self.broadcaster.has_viewers:
+            self.broadcaster.publish(frame)
+
+    def stats(self):
+        return {
+            "source_id": self.source_id,
+            "uri": str(self.uri),
+            "kind": self.kind,
+            "state": self.state,
+            "active": self.active,
+            "frames": self.frames,
+            "capture_fps": self._capture_fps,
+            "read_failures": self.read_failures,
+            "reconnects": self.reconnects,
+            "last_error": self.last_error,
+            "last_frame_age": None if self.last_frame_at is None else time.time() - self.last_frame_at,
+            "frame_shape": list(self.frame_shape) if self.frame_shape else None,
+            "uptime_seconds": time.time() - self.started_at if self.active else 0.0,
+            "buffer": self.ring.stats(),
+            "stream": self.broadcaster.stats()
+        }
+
+
+class SourceManager:
+    """The set of capture workers, one per source id"""
+
+    def __init__(self, registry=None, **worker_options):
+        self.registry = registry
+        self.worker_options = worker_options
+        self._workers = {}
+        self._lock = threading.Lock()
+        self._loop = None
+
+    def attach(self, loop):
+        self._loop = loop
+
+    def add(self, source_id, uri, start=True):
+        """Register a source (replacing a stopped one with the same id) and start capturing"""
+        with self._lock:
+            worker = self._workers.get(source_id)
+            if worker is not None and worker.active:
+                raise ValueError(f"Source {source_id} already exists")
+            worker = CaptureWorker(source_id, uri, registry=self.registry, **self.worker_options)
+            self._workers[source_id] = worker
+        if start:
+            worker.start(self._loop)
+        return worker
+
+    def get(self, source_id):
+        return self._workers.get(source_id)
+
+    def remove(self, source_id):
+        with self._lock:
+            worker = self._workers.pop(source_id, None)
+        if worker is not None:
+            worker.stop()
+        return worker
+
+    def workers(self):
+        return list(self._workers.values())
+
+    def stop_all(self):
+        for worker in self.workers():
+            worker.stop()
+
+    def stats(self):
+        return {"sources": [worker.stats() for worker in self.workers()]}
+
+
+def parse_sources_config(value):
+    """Parse "id=uri,id=uri" (a bare uri gets its position as id).
+
+    An item is only split at "=" when the part before it can be an id, so a bare uri with a
+    query string (rtsp://cam/stream?channel=1) stays whole.
+    """
+    sources = []
+    for position, item in enumerate(filter(None, (part.strip() for part in (value or "").split(",")))):
+        source_id, sep, uri = item.partition("=")
+        if not sep or not source_id.strip() or any(c in source_id for c in ("://", "/", "?")):
+            source_id, uri = f"source-{position}", item
+        sources.append((source_id.strip(), uri.strip()))
+    return sources
@@ -0,0 +1,120 @@
+import os
+import threading
+from datetime import datetime
+
+from watchdog.events import FileSystemEventHandler
+
+SORT_KEYS = ("created_at", "modified_at", "size_bytes", "filename")
+
+
+class VideoIndex:
+    """In-memory listing of one video directory.
+
+    Built once with rebuild() and then kept current from watchdog events through
+    VideoIndexHandler, so listings never touch the disk. Sorted views are cached until
+    the next change.
+    """
+
+    def __init__(self, directory, video_type):
+        self.directory = directory
+        self.video_type = video_type
+        self._entries = {}  # filename -> entry
+        self._sorted = {}  # (sort, order) -> list of entries
+        self._changes = None  # filename -> entry (None when removed), recorded while a rebuild scans
+        self._lock = threading.Lock()
+
+    def _entry(self, filename, stat):
+        return {
+            "filename": filename,
+            "size_bytes": stat.st_size,
+            "created_at": datetime.fromtimestamp(stat.st_ctime).isoformat(),
+            "modified_at": datetime.fromtimestamp(stat.st_mtime).isoformat(),
+            "type": self.video_type
+        }
+
+    def rebuild(self):
+        """Rescan the directory. Safe to run while the observer is already updating the index:
+        changes it reports during the scan are applied on top of the scan"""
+        with self._lock:
+            self._changes = {}
+        entries = {}
+        if os.path.exists(self.directory):
+            with os.scandir(self.directory) as it:
+                for item in it:
+                    if item.is_file():
+                        entries[item.name] = self._entry(item.name, item.stat())
+        with self._lock:
+            for filename, entry in self._changes.items():
+                if entry is None:
+                    entries.pop(filename, None)
+                else:
+                    entries[filename] = entry
+            self._changes = None
+            self._entries = entries
+            self._sorted = {}
+        return len(entries)
+
+    def _owns(self, path):
+        return os.path.dirname(os.path.abspath(path)) == os.path.abspath(self.directory)
+
+    def upsert(self, path):
+        if not self._owns(path):
+            return
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            self.remove(path)
+            return
+        filename = os.path.basename(path)
+        entry = self._entry(filename, stat)
+        with self._lock:
+            self._entries[filename] = entry
+            if self._changes is not None:
+                self._changes[filename] = entry
+            self._sorted = {}
+
+    def remove(self, path):
+        if not self._owns(path):
+            return
+        filename = os.path.basename(path)
+        with self._lock:
+            if self._changes is not None:
+                self._changes[filename] = None
+            if self._entries.pop(filename, None) is not None:
+                self._sorted = {}
+
+    def list(self, offset=0, limit=None, sort="created_at", order="desc"):
+        """Return (page of entries, total count)"""
+        key = (sort, order)
+        with self._lock:
+            ordered = self._sorted.get(key)
+            if ordered is None:
+                ordered = sorted(self._entries.values(), key=lambda v: v[sort], reverse=order == "desc")
+                self._sorted[key] = ordered
+        end = None if limit is None else offset + limit
+        return ordered[offset:end], len(ordered)
+
+
+class VideoIndexHandler(FileSystemEventHandler):
+    """Applies create/modify/delete/move events of a watched directory to a VideoIndex"""
+
+    def __init__(self, index):
+        self.index = index
+
+    def on_created(self, event):
+        if not event.is_directory:
+            self.index.upsert(event.src_path)
+
+    def on_modified(self, event):
+        # Sizes change while a clip is still being written
+        if not event.is_directory:
+            self.index.upsert(event.src_path)
+
+    def on_deleted(self, event):
+        if not event.is_directory:
+            self.index.remove(event.src_path)
+
+    def on_moved(self, event):
+        if not event.is_directory:
+            self.index.remove(event.src_path)
+            self.index.upsert(event.dest_path)